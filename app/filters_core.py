@@ -1,7 +1,9 @@
+import re
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Any, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -19,59 +21,245 @@ class FilterCondition:
     value: Any  # для RANGE очікуємо Tuple[start, end]
 
 
-def _apply_single_condition(df: pd.DataFrame, cond: FilterCondition) -> pd.DataFrame:
-    col = cond.column
-    if col not in df.columns:
-        return df
+# Відносна вартість перевірки: дешеві умови рахуємо першими,
+# щоб дорогий пошук підрядка працював уже по звуженій таблиці.
+_OPERATOR_COST = {
+    Operator.EQUALS: 1,
+    Operator.NOT_EQUALS: 1,
+    Operator.RANGE: 2,
+    Operator.CONTAINS: 3,
+}
 
-    series = df[col]
-    op = cond.operator
-    val = cond.value
+# Коли лишається менше цієї частки рядків, наступні умови
+# рахуються лише по рядках, що вціліли.
+_NARROW_FRACTION = 0.1
 
-    # --------- Діапазон (включно з датами в текстових полях) ---------
-    if op == Operator.RANGE:
-        start, end = val  # (можуть бути None / None)
+# Стовпці, де найдовший рядок не довший за це, шукаємо через np.char.find
+_FIXED_WIDTH_MAX = 64
+
+
+# Перша дата формату дд.мм.рррр у тексті комірки
+_DATE_RE = re.compile(r"(\d{2}\.\d{2}\.\d{4})")
+
+
+def _cost(cond: FilterCondition) -> int:
+    return _OPERATOR_COST.get(cond.operator, len(_OPERATOR_COST))
+
+
+def _as_mask(result: pd.Series) -> np.ndarray:
+    """Перетворити результат порівняння на bool-масив (NA → False)."""
+    return result.to_numpy(dtype=bool, na_value=False)
+
+
+def _as_str(series: pd.Series) -> pd.Series:
+    """Стовпець як рядки; вже рядковий повертається як є, без копії."""
+    return series if pd.api.types.is_string_dtype(series) else series.astype(str)
+
+
+def _lowered_strings(
+    df: pd.DataFrame,
+    column: str,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    """
+    Текстові значення стовпця в нижньому регістрі.
+
+    Для всього df результат кешується, тож кілька CONTAINS-умов по
+    одному стовпцю перетворюють його на рядки лише раз.
+    """
+    values = cache.get(column)
+    if values is None:
+        series = df[column] if rows is None else df[column].iloc[rows]
+        lowered = _as_str(series).str.lower()
+        # короткий текст — масив фіксованої ширини для np.char.find,
+        # довгий лишається об'єктами, щоб не роздувати пам'ять
+        if lowered.str.len().max() <= _FIXED_WIDTH_MAX:
+            lowered = lowered.fillna("").to_numpy(dtype=str)
+        else:
+            lowered = lowered.to_numpy()
+        if rows is not None:
+            return lowered
+        values = cache[column] = lowered
+    return values if rows is None else values[rows]
+
+
+def _parsed_dates(
+    df: pd.DataFrame,
+    column: str,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    """
+    Дати стовпця як масив datetime64.
+
+    Для текстового стовпця з тексту витягується перша дата дд.мм.рррр —
+    це regex + розбір, тому результат для всього df кешується під
+    ключем ("dates", column) і повторні RANGE-умови лише порівнюють числа.
+    """
+    key = ("dates", column)
+    dates = cache.get(key)
+    if dates is None:
+        series = df[column] if rows is None else df[column].iloc[rows]
 
         # Якщо стовпець уже datetime64 – використовуємо напряму
         if pd.api.types.is_datetime64_any_dtype(series):
-            date_series = series
-        else:
-            # Спроба витягнути першу дату формату дд.мм.рррр з тексту
-            extracted = series.astype(str).str.extract(r"(\d{2}\.\d{2}\.\d{4})")[0]
-            date_series = pd.to_datetime(
-                extracted, format="%d.%m.%Y", errors="coerce"
-            )
+            return series.to_numpy()
+
+        # Спроба витягнути першу дату формату дд.мм.рррр з тексту.
+        # Дати в стовпці повторюються, тож regex і розбір — по унікальних.
+        codes, uniques = pd.factorize(_as_str(series))
+        extracted = pd.Series(uniques, dtype=object).str.extract(_DATE_RE, expand=False)
+        parsed = pd.to_datetime(extracted, format="%d.%m.%Y", errors="coerce", cache=True).to_numpy()
+        # код -1 (порожня комірка) потрапляє на доданий у кінець NaT
+        parsed = np.append(parsed, np.datetime64("NaT"))[codes]
+        if rows is not None:
+            return parsed
+        dates = cache[key] = parsed
+    return dates if rows is None else dates[rows]
+
+
+def _contains_mask(values: np.ndarray, needle: str) -> np.ndarray:
+    """Пошук підрядка без regex (NA/не-рядки → False)."""
+    if values.dtype.kind == "U":
+        # масив фіксованої ширини: пошук повністю в C
+        return np.char.find(values, needle) >= 0
+    return np.fromiter(
+        (isinstance(v, str) and needle in v for v in values),
+        dtype=bool,
+        count=len(values),
+    )
 
-        mask = pd.Series(True, index=df.index)
 
-        if start is not None:
-            mask &= date_series >= start
-        if end is not None:
-            mask &= date_series <= end
+def _category_equals_mask(series: pd.Series, val: Any) -> np.ndarray:
+    """Порівняння category-стовпця зі значенням через цілі коди."""
+    categories = series.cat.categories
+    if val not in categories:
+        return np.zeros(len(series), dtype=bool)
+    return series.cat.codes.to_numpy() == categories.get_loc(val)
 
-        return df[mask]
 
-    # --------- Містить ---------
-    if op == Operator.CONTAINS:
-        text = str(val)
-        return df[series.astype(str).str.contains(text, case=False, na=False)]
+def _column(df: pd.DataFrame, column: str, rows: Optional[np.ndarray]) -> pd.Series:
+    return df[column] if rows is None else df[column].iloc[rows]
 
-    # --------- Дорівнює ---------
-    if op == Operator.EQUALS:
-        return df[series == val]
 
-    # --------- Не дорівнює ---------
-    if op == Operator.NOT_EQUALS:
-        return df[series != val]
+# --------- Діапазон (включно з датами в текстових полях) ---------
+def _range_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    start, end = cond.value  # (можуть бути None / None)
 
-    return df
+    dates = _parsed_dates(df, cond.column, rows, cache)
+    mask = np.ones(len(dates), dtype=bool)
 
+    if start is not None:
+        mask &= dates >= start
+    if end is not None:
+        mask &= dates <= end
+
+    return mask
+
+
+# --------- Містить ---------
+def _contains_condition_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    text = str(cond.value).lower()
+    return _contains_mask(_lowered_strings(df, cond.column, rows, cache), text)
+
+
+# --------- Дорівнює / не дорівнює ---------
+def _equals_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    series = _column(df, cond.column, rows)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _category_equals_mask(series, cond.value)
+    return _as_mask(series == cond.value)
+
+
+def _not_equals_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    return ~_equals_mask(df, cond, rows, cache)
+
+
+# Оператор → функція (df, cond, rows, cache) -> bool-маска.
+# Новий оператор додається одним рядком тут.
+OP_TABLE: Dict[Operator, Callable[..., np.ndarray]] = {
+    Operator.RANGE: _range_mask,
+    Operator.CONTAINS: _contains_condition_mask,
+    Operator.EQUALS: _equals_mask,
+    Operator.NOT_EQUALS: _not_equals_mask,
+}
+
+
+def _condition_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: Dict[Any, np.ndarray],
+) -> np.ndarray:
+    """
+    Булева маска для однієї умови.
+
+    rows — позиції рядків, по яких рахувати (None — весь df).
+    """
+    handler = OP_TABLE.get(cond.operator)
+    if handler is None:
+        return np.ones(len(df) if rows is None else len(rows), dtype=bool)
+    return handler(df, cond, rows, cache)
+
+
+def apply_filters(
+    df: pd.DataFrame,
+    conditions: List[FilterCondition],
+    cache: Optional[Dict[Any, np.ndarray]] = None,
+) -> pd.DataFrame:
+    """
+    Застосувати список умов.
+
+    Маски всіх умов рахуються по вихідному df і поєднуються в одному
+    bool-масиві, тож зріз таблиці робиться лише один раз наприкінці.
+    Умови перевіряються від дешевих до дорогих; коли рядків лишається
+    мало, решта умов рахується тільки по них.
+
+    cache — словник похідних даних стовпців (рядки в нижньому регістрі,
+    розібрані дати). Його можна передавати між викликами для того самого
+    df, щоб не рахувати їх заново; після зміни df кеш треба скинути.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    rows = None  # позиції рядків, що лишилися після звуження
+    if cache is None:
+        cache = {}
+    for cond in sorted(conditions, key=_cost):
+        if cond.column not in df.columns:
+            continue
+
+        if rows is None:
+            np.logical_and(mask, _condition_mask(df, cond, None, cache), out=mask)
+            # один прохід по масці: і для звуження, і для раннього виходу
+            remaining = np.count_nonzero(mask)
+            if remaining < _NARROW_FRACTION * len(df):
+                rows = np.flatnonzero(mask)
+        else:
+            sub_mask = _condition_mask(df, cond, rows, cache)
+            mask[rows] = sub_mask
+            rows = rows[sub_mask]
+            remaining = len(rows)
 
-def apply_filters(df: pd.DataFrame, conditions: List[FilterCondition]) -> pd.DataFrame:
-    """Застосувати список умов послідовно."""
-    result = df
-    for cond in conditions:
-        result = _apply_single_condition(result, cond)
-        if result.empty:
+        if not remaining:
             break
-    return result
\ No newline at end of file
+    return df.iloc[mask]
@@ -1,6 +1,97 @@
 import os
+import zipfile
+from itertools import islice
+from typing import Iterable
+
 import pandas as pd
-from docx import Document
+from lxml import etree
+
+from .filters_core import FilterCondition, apply_filters
+
+
+# Пространство имён WordprocessingML — читаем XML таблиц напрямую
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W = f"{{{W_NS}}}"
+
+# Всё, что нужно из строки <w:tr>, одним скомпилированным XPath-запросом:
+# ячейки, их объединения и текстовые элементы абзацев — в порядке документа
+_ROW_NODES = etree.XPath(
+    "w:tc"
+    " | w:tc/w:tcPr/w:gridSpan | w:tc/w:tcPr/w:vMerge"
+    " | w:tc/w:p"
+    " | w:tc/w:p//w:t | w:tc/w:p//w:tab | w:tc/w:p//w:br | w:tc/w:p//w:cr",
+    namespaces={"w": W_NS},
+)
+_TC, _P, _T = W + "tc", W + "p", W + "t"
+_GRID_SPAN, _V_MERGE = W + "gridSpan", W + "vMerge"
+_SPECIAL_TEXT = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n"}
+
+
+def _row_values(tr, prev_values: list[str] | None) -> list[str]:
+    """
+    Тексты ячеек строки <w:tr> так же, как их отдаёт row.cells:
+    объединённая по горизонтали ячейка повторяется gridSpan раз,
+    продолжение вертикального объединения берёт текст из строки выше.
+    Текст ячейки — её абзацы через перевод строки (как cell.text).
+    """
+    # (части текста, span, vMerge) по каждой <w:tc>
+    cells: list[tuple[list[str], list]] = []
+    parts: list[str] = []
+    merge: list = []
+    first_paragraph = True
+    for el in _ROW_NODES(tr):
+        tag = el.tag
+        if tag == _TC:
+            parts, merge = [], [1, None]
+            cells.append((parts, merge))
+            first_paragraph = True
+        elif tag == _T:
+            if el.text:
+                parts.append(el.text)
+        elif tag == _P:
+            if not first_paragraph:
+                parts.append("\n")
+            first_paragraph = False
+        elif tag == _GRID_SPAN:
+            merge[0] = int(el.get(W + "val", 1))
+        elif tag == _V_MERGE:
+            merge[1] = el.get(W + "val", "continue")
+        else:
+            parts.append(_SPECIAL_TEXT[tag])
+
+    values: list[str] = []
+    for parts, (span, v_merge) in cells:
+        pos = len(values)
+        if v_merge == "continue" and prev_values is not None and len(prev_values) >= pos + span:
+            values.extend(prev_values[pos:pos + span])
+        else:
+            values.extend(["".join(parts).strip()] * span)
+    return values
+
+
+def _iter_table_rows(path: str):
+    """
+    Потоково пройти word/document.xml и отдавать строки таблиц верхнего
+    уровня (как doc.tables) парами (tbl, tr).
+
+    Обработанные строки сразу очищаются и удаляются из дерева, так что
+    в памяти держится только текущая строка, а не весь документ.
+    """
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        for _, tr in etree.iterparse(f, events=("end",), tag=W + "tr"):
+            tbl = tr.getparent()
+            # строки вложенных таблиц (внутри ячеек) — часть текста ячейки
+            if tbl is None or tbl.tag != W + "tbl" or tbl.getparent().tag != W + "body":
+                continue
+
+            yield tbl, tr
+
+            tr.clear()
+            while tr.getprevious() is not None:
+                del tbl[0]
+            # всё, что в body до текущей таблицы, уже прочитано
+            while tbl.getprevious() is not None:
+                del tbl.getparent()[0]
 
 
 def _load_from_docx(path: str) -> pd.DataFrame:
@@ -14,114 +105,265 @@ def _load_from_docx(path: str) -> pd.DataFrame:
         * пропускаем их первую строку (свою шапку);
         * добавляем строки в общий список.
     - Полностью пустые строки отбрасываем.
-    """
-    doc = Document(path)
 
+    XML документа читаем потоково (lxml.iterparse по <w:tr>), текст ячеек
+    берём прямо из <w:tc>, без объектной модели python-docx.
+    """
     header: list[str] | None = None
-    rows: list[dict[str, str]] = []
+    columns: list[str] = []
+    positions: list[int] = []
+    # Данные копим по колонкам: один список на колонку вместо dict на строку
+    col_values: list[list[str]] = []
 
-    for table in doc.tables:
-        # Таблица должна хотя бы иметь шапку + одну строку данных
-        if len(table.rows) < 2:
-            continue
+    current_tbl = None
+    current_header: list[str] = []
+    # Шапку таблицы проверяем, только когда пришла первая строка данных:
+    # таблица должна хотя бы иметь шапку + одну строку данных
+    header_checked = False
+    skip_table = False
+    prev_values: list[str] | None = None
 
-        # Шапка текущей таблицы
-        current_header = [cell.text.strip() for cell in table.rows[0].cells]
+    for tbl, tr in _iter_table_rows(path):
+        if tbl is not current_tbl:
+            # Шапка новой таблицы
+            current_tbl = tbl
+            current_header = _row_values(tr, None)
+            prev_values = current_header
+            header_checked = False
+            skip_table = False
+            continue
 
-        # Если шапка полностью пустая — пропускаем таблицу
-        if not any(current_header):
+        if skip_table:
             continue
 
-        # Первая «нормальная» таблица — задаём эталонный header
-        if header is None:
-            header = current_header
-        else:
+        if not header_checked:
+            header_checked = True
+
+            # Если шапка полностью пустая — пропускаем таблицу
+            if not any(current_header):
+                skip_table = True
+                continue
+
+            # Первая «нормальная» таблица — задаём эталонный header
+            if header is None:
+                header = current_header
+                # Повторяющиеся заголовки схлопываются в одну колонку
+                # (значение берётся из последней из них)
+                last_pos = {name: i for i, name in enumerate(header)}
+                columns = list(last_pos)
+                positions = list(last_pos.values())
+                col_values = [[] for _ in columns]
             # Если количество колонок не совпадает — считаем,
             # что это другая структура, такую таблицу пропускаем.
-            if len(current_header) != len(header):
+            elif len(current_header) != len(header):
+                skip_table = True
                 continue
 
-        # Обрабатываем строки данных (пропускаем собственный header таблицы)
-        for row in table.rows[1:]:
-            values = [cell.text.strip() for cell in row.cells]
+        # Строка данных (собственный header таблицы уже пропущен)
+        values = _row_values(tr, prev_values)
+        prev_values = values
 
-            # Выравниваем длину под header
-            if len(values) < len(header):
-                values += [""] * (len(header) - len(values))
-            elif len(values) > len(header):
-                values = values[: len(header)]
+        # Длину под header выравниваем без копий строки: лишние ячейки
+        # не смотрим, недостающие считаем пустыми
+        n = len(values)
+        if n > len(header):
+            n = len(header)
+            row_is_empty = not any(islice(values, n))
+        else:
+            row_is_empty = not any(values)
 
-            # Если строка полностью пустая — пропускаем
-            if not any(values):
-                continue
+        # Если строка полностью пустая — пропускаем
+        if row_is_empty:
+            continue
 
-            rows.append(dict(zip(header, values)))
+        for buf, i in zip(col_values, positions):
+            buf.append(values[i] if i < n else "")
 
     if header is None:
         raise ValueError("У документі Word не знайдено придатних таблиць.")
 
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame(dict(zip(columns, col_values)), copy=False)
     return df
 
 
-def load_test_df(path: str = "registry_test.csv") -> pd.DataFrame:
+# Примерный набор колонок-дат (под твой реєстр, можно дополнять)
+DATE_COLS = [
+    "Дата_реєстрації",
+    "Дата_нар",
+    "Дата_повідомлення_підозри",
+    "Дата_зупинення",
+    "Дата_доручення_розшуку",
+    "Дата_заведення_ОРС",
+    "Дата_інфо_про_перетин",
+    "Дата_адмін",
+    "Дата_міжнар_розшуку",
+    "Дата_виїзду",
+    "Дата_оголошення_в_розшук",
+]
+
+# Булеві (Так/Ні) – можна доповнювати список при потребі
+BOOL_COLS = [
+    "Є_виїзд_за_кордон",
+    "Є_Інтерпол",
+    "Є_інфо_про_перетин_кордону",
+    "Є_адмін_відповідальність",
+]
+
+# Значения булевых колонок, которые считаются «да»
+TRUE_VALUES = ["Так", "так", "ТАК", "True", True]
+
+# Форматы дат, которые пробуем явно: с format to_datetime идёт по быстрому пути
+DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d")
+
+
+def _parse_known_format(values: pd.Series) -> pd.Series | None:
+    """Разобрать даты одним из DATE_FORMATS; None — если ни один не подошёл."""
+    filled = values.notna() & (values.astype(str).str.strip() != "")
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+        if parsed[filled].notna().all():
+            return parsed
+    return None
+
+
+def _parse_date_columns(df: pd.DataFrame, cols: list[str]) -> None:
+    """
+    Перевести колонки-даты в datetime.
+
+    Все колонки склеиваем в одну Series и разбираем за один вызов с явным
+    форматом. Если формат не угадан — разбираем каждую колонку отдельно
+    с автоопределением (dayfirst), как раньше.
+    """
+    if not cols:
+        return
+
+    n = len(df)
+    stacked = pd.concat([df[c] for c in cols], ignore_index=True)
+    parsed = _parse_known_format(stacked)
+
+    for i, col in enumerate(cols):
+        if parsed is not None:
+            df[col] = parsed.iloc[i * n:(i + 1) * n].to_numpy()
+        else:
+            df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+
+
+# Сколько значений смотрим, чтобы оценить число уникальных в колонке
+CATEGORY_SAMPLE_SIZE = 10_000
+
+
+def _to_categories(df: pd.DataFrame, text_cols: Iterable[str]) -> None:
+    """
+    Перевести текстовые колонки с небольшим числом уникальных значений
+    в category: сравнение «дорівнює» идёт по целым кодам, а не строкам.
+    Колонки из text_cols (под поиск подстроки) оставляем как есть.
+    """
+    skip = set(text_cols)
+    for col in df.columns:
+        if col in skip:
+            continue
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if not pd.api.types.is_string_dtype(series):
+            continue
+        sample = series.iloc[:CATEGORY_SAMPLE_SIZE]
+        if sample.nunique() < max(64, 0.5 * len(sample)):
+            df[col] = series.astype("category")
+
+
+def _downcast_integers(df: pd.DataFrame) -> None:
+    """Целые колонки храним в самом узком подходящем типе (int8/int16/...)."""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+
+
+def _read_csv(path: str, chunksize: int | None = None):
+    """
+    Прочитать CSV, разбирая колонки-даты прямо при чтении.
+
+    read_csv с date_format либо разбирает колонку целиком, либо оставляет
+    её текстом — такие колонки потом доразбирает _parse_date_columns.
+    С chunksize возвращает итератор по кускам файла.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    parse_dates = [c for c in DATE_COLS if c in header]
+    return pd.read_csv(
+        path,
+        parse_dates=parse_dates,
+        date_format=DATE_FORMATS[0],
+        chunksize=chunksize,
+    )
+
+
+def _convert_types(df: pd.DataFrame) -> None:
+    """Даты и булевы колонки — в нормальные типы (на месте)."""
+    # колонки, которые уже разобрал read_csv, повторно не трогаем
+    _parse_date_columns(df, [
+        c for c in DATE_COLS
+        if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c])
+    ])
+
+    for bcol in BOOL_COLS:
+        if bcol in df.columns:
+            # всё, что не из TRUE_VALUES (включая «Ні» и пустые), — False
+            df[bcol] = df[bcol].isin(TRUE_VALUES).to_numpy()
+
+
+# По сколько строк читаем CSV, когда фильтруем прямо при загрузке
+CSV_CHUNK_SIZE = 200_000
+
+
+def _read_csv_filtered(path: str, conditions: list[FilterCondition]) -> pd.DataFrame:
+    """
+    Читать CSV кусками и сразу фильтровать: в памяти одновременно
+    только текущий кусок и уже отобранные строки.
+    """
+    parts = []
+    for chunk in _read_csv(path, chunksize=CSV_CHUNK_SIZE):
+        _convert_types(chunk)
+        parts.append(apply_filters(chunk, conditions))
+    # индекс кусков сквозной — номера строк как при полной загрузке
+    return pd.concat(parts)
+
+
+def load_test_df(
+    path: str = "registry_test.csv",
+    text_cols: Iterable[str] = (),
+    conditions: list[FilterCondition] | None = None,
+) -> pd.DataFrame:
     """
     Универсальная загрузка:
     - .csv
     - .xlsx / .xls
     - .docx (одна или несколько однотипных таблиц Word в один DataFrame)
+
+    text_cols — колонки, которые не нужно переводить в category
+    (например, те, по которым ищут подстроку).
+
+    conditions — если заданы, возвращаются только строки, прошедшие
+    фильтры; CSV при этом читается кусками по CSV_CHUNK_SIZE строк.
     """
     ext = os.path.splitext(path)[1].lower()
+    is_csv = ext not in (".xlsx", ".xls", ".docx")  # по умолчанию пытаемся как csv
 
-    if ext == ".csv":
-        df = pd.read_csv(path)
-    elif ext in (".xlsx", ".xls"):
-        df = pd.read_excel(path)
-    elif ext == ".docx":
-        df = _load_from_docx(path)
+    if is_csv and conditions is not None:
+        df = _read_csv_filtered(path, conditions)
     else:
-        # по умолчанию пытаемся как csv
-        df = pd.read_csv(path)
-
-    # Примерный набор колонок-дат (под твой реєстр, можно дополнять)
-    date_cols = [
-        "Дата_реєстрації",
-        "Дата_нар",
-        "Дата_повідомлення_підозри",
-        "Дата_зупинення",
-        "Дата_доручення_розшуку",
-        "Дата_заведення_ОРС",
-        "Дата_інфо_про_перетин",
-        "Дата_адмін",
-        "Дата_міжнар_розшуку",
-        "Дата_виїзду",
-        "Дата_оголошення_в_розшук",
-    ]
-    for col in date_cols:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+        if ext in (".xlsx", ".xls"):
+            df = pd.read_excel(path)
+        elif ext == ".docx":
+            df = _load_from_docx(path)
+        else:
+            df = _read_csv(path)
 
-    # Булеві (Так/Ні) – можна доповнювати список при потребі
-    bool_map = {
-        "Так": True,
-        "так": True,
-        "ТАК": True,
-        "Ні": False,
-        "ні": False,
-        "НІ": False,
-        "True": True,
-        "False": False,
-        True: True,
-        False: False,
-    }
-    bool_cols = [
-        "Є_виїзд_за_кордон",
-        "Є_Інтерпол",
-        "Є_інфо_про_перетин_кордону",
-        "Є_адмін_відповідальність",
-    ]
-    for bcol in bool_cols:
-        if bcol in df.columns:
-            df[bcol] = df[bcol].map(bool_map).fillna(False).astype(bool)
+        _convert_types(df)
+        if conditions is not None:
+            df = apply_filters(df, conditions)
 
-    return df
\ No newline at end of file
+    _downcast_integers(df)
+    _to_categories(df, text_cols)
+
+    return df
@@ -1,17 +1,22 @@
 import sys
 import os
+import csv
 import json
 from pathlib import Path
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Set, Optional
+from typing import Any, Callable, Set, Optional
 
 import re
-import unicodedata
+from collections import Counter
+from copy import deepcopy
+import numpy as np
 import pandas as pd
 
 from docx import Document
 from docx.enum.section import WD_ORIENT
+from docx.oxml.ns import nsmap
+from docx.table import _Cell
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog,
@@ -19,9 +24,11 @@ from PySide6.QtWidgets import (
     QPushButton, QLabel, QListWidget, QTableView,
     QMessageBox, QComboBox, QLineEdit, QDialog,
     QFormLayout, QDialogButtonBox, QTabWidget,
-    QAbstractItemView, QSplitter, QTextEdit,
+    QAbstractItemView, QSplitter, QTextEdit, QHeaderView,
+)
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QObject, QRegularExpression, QThread, QTimer, Signal,
 )
-from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
 from PySide6.QtGui import QPixmap, QTextCursor, QTextCharFormat, QColor
 
 
@@ -29,6 +36,12 @@ CONFIG_PATH = Path.home() / ".table_filter_engine.json"
 STATE_PATH = Path.home() / ".table_filter_engine_state.pkl"
 SERVICE_COLS = {"is_archived", "is_deleted"}
 
+# пауза в наборе текста глобального поиска перед фильтрацией, мс
+SEARCH_DEBOUNCE_MS = 200
+
+# сколько последних наборов условий помним вместе с их масками
+COND_MASK_CACHE_SIZE = 8
+
 
 # ============================================================
 #                 УТИЛИТЫ / ЗАГРУЗКА ТАБЛИЦ
@@ -73,16 +86,35 @@ def _load_from_docx_first_table(path: str) -> pd.DataFrame:
     return df.fillna("")
 
 
+# Сколько символов из начала csv смотрим, чтобы угадать разделитель
+CSV_SNIFF_CHARS = 64 * 1024
+
+
+def _sniff_csv_sep(path: str) -> str:
+    """Разделитель csv по первым CSV_SNIFF_CHARS символам (по умолчанию запятая)."""
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        sample = f.read(CSV_SNIFF_CHARS)
+    # недочитанную последнюю строку отбрасываем, чтобы не сбить подсчёт
+    sample = sample[:sample.rfind("\n") + 1] or sample
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
 def load_test_df(path: str) -> pd.DataFrame:
     """
     Универсальный загрузчик: csv/xlsx/xls/docx.
-    Для csv: автоопределение sep.
+    Для csv: разделитель угадываем по началу файла, а читаем быстрым
+    C-движком (engine="python" с sep=None на больших файлах в разы медленнее).
+    Текст читается как dtype=str: в pandas 3 при установленном pyarrow
+    это строки в буферах Arrow, и .str-операции идут в его ядрах.
     """
     p = Path(path)
     ext = p.suffix.lower()
 
     if ext == ".csv":
-        df = pd.read_csv(path, dtype=str, sep=None, engine="python").fillna("")
+        df = pd.read_csv(path, dtype=str, sep=_sniff_csv_sep(path), engine="c").fillna("")
         return df
 
     if ext in (".xlsx", ".xls"):
@@ -95,6 +127,90 @@ def load_test_df(path: str) -> pd.DataFrame:
     raise ValueError(f"Формат не підтримується: {ext}")
 
 
+# Тег <w:t>: в шаблонной строке таблицы Word он ровно один на ячейку
+_W_T = f"{{{nsmap['w']}}}t"
+
+
+def save_df_to_docx(df: pd.DataFrame, path: str):
+    """
+    Сохранить таблицу в .docx (альбомная ориентация, стиль «Table Grid»).
+
+    Строки данных не добавляются через add_row()/cell.text по одной ячейке:
+    одна строка-шаблон копируется целиком, и в её <w:t> сразу пишется текст.
+    Текст с табуляцией/переводами строк пишем через cell.text, как раньше.
+    """
+    doc = Document()
+    section = doc.sections[0]
+    section.orientation = WD_ORIENT.LANDSCAPE
+    new_width, new_height = section.page_height, section.page_width
+    section.page_width = new_width
+    section.page_height = new_height
+
+    table = doc.add_table(rows=2, cols=len(df.columns))
+    table.style = "Table Grid"
+
+    hdr_cells = table.rows[0].cells
+    for j, col_name in enumerate(df.columns):
+        hdr_cells[j].text = str(col_name)
+
+    # шаблон строки данных: в каждой ячейке один абзац с одним <w:t>
+    template_row = table.rows[1]
+    for cell in template_row.cells:
+        cell.text = " "
+    template = template_row._tr
+    tbl = table._tbl
+    tbl.remove(template)
+
+    # тексты готовим по колонкам, чтобы в цикле по строкам остались
+    # только копия шаблона и запись в <w:t>
+    values = df.to_numpy(dtype=object, na_value="")
+    columns = [[str(v) for v in values[:, j]] for j in range(values.shape[1])]
+    for texts in zip(*columns):
+        tr = deepcopy(template)
+        tbl.append(tr)
+        for t, text in zip(list(tr.iter(_W_T)), texts):
+            if "\t" in text or "\n" in text or "\r" in text:
+                _Cell(t.getparent().getparent().getparent(), table).text = text
+            else:
+                t.text = text
+
+    doc.save(path)
+
+
+def save_df_to_file(df: pd.DataFrame, path: str, selected_filter: str):
+    """Сохранить таблицу в формате, выбранном в диалоге (docx/xlsx/csv)."""
+    if path.lower().endswith(".docx") or "Word" in selected_filter:
+        save_df_to_docx(df, path)
+    elif path.lower().endswith(".xlsx") or "Excel" in selected_filter:
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+class ExportWorker(QObject):
+    """
+    Запись файла экспорта в отдельном потоке: docx на тысячи строк
+    пишется секунды, и окно за это время не должно замирать.
+    Результат возвращается сигналами в поток интерфейса.
+    """
+    finished = Signal(str)
+    failed = Signal(str)
+
+    def __init__(self, df: pd.DataFrame, path: str, selected_filter: str):
+        super().__init__()
+        self.df = df
+        self.path = path
+        self.selected_filter = selected_filter
+
+    def run(self):
+        try:
+            save_df_to_file(self.df, self.path, self.selected_filter)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(self.path)
+
+
 # ============================================================
 #                        ФИЛЬТРЫ
 # ============================================================
@@ -106,70 +222,371 @@ class Operator(str, Enum):
     RANGE = "range"
 
 
-@dataclass
+@dataclass(frozen=True)
 class FilterCondition:
     column: str
     operator: Operator
-    value: Any
+    value: Any  # для RANGE — кортеж (от, до), чтобы условие хэшировалось
+
+
+# Относительная стоимость проверки: дешёвые условия считаем первыми,
+# чтобы поиск подстроки шёл уже по суженной таблице.
+_OPERATOR_COST = {
+    Operator.EQUALS: 1,
+    Operator.NOT_EQUALS: 1,
+    Operator.RANGE: 2,
+    Operator.CONTAINS: 3,
+}
+
+# Когда остаётся меньше этой доли строк, следующие условия
+# считаются только по уцелевшим строкам.
+_NARROW_FRACTION = 0.1
+
+
+def _condition_cost(cond: FilterCondition) -> int:
+    return _OPERATOR_COST.get(cond.operator, len(_OPERATOR_COST))
+
+
+# Колонки, где самая длинная строка не длиннее этого, ищем через np.char.find
+_FIXED_WIDTH_MAX = 64
+
+
+# Колонки с небольшим числом разных значений сравниваем по целым кодам
+_CODED_MAX_UNIQUES = 50
+
+
+# Дата вида dd.mm.yyyy внутри текста ячейки
+_DATE_RE = re.compile(r"(\d{2}\.\d{2}\.\d{4})")
+# все даты dd.mm.yyyy в строке, включая перекрывающиеся
+_DATE_OVERLAP_RE = re.compile(r"(?=(\d{2}\.\d{2}\.\d{4}))")
+
+
+def _as_str(ser: pd.Series) -> pd.Series:
+    """Колонка как строки; уже строковую возвращаем как есть, без копии."""
+    return ser if pd.api.types.is_string_dtype(ser) else ser.astype(str)
 
 
 def _to_datetime_series(series: pd.Series) -> pd.Series:
-    # пытаемся вытащить dd.mm.yyyy из строк и распарсить
-    s = series.astype(str)
-    d = s.str.extract(r"(\d{2}\.\d{2}\.\d{4})")[0]
-    return pd.to_datetime(d, format="%d.%m.%Y", errors="coerce")
+    # пытаемся вытащить dd.mm.yyyy из строк и распарсить;
+    # даты в колонке повторяются, поэтому regex и разбор — по уникальным
+    codes, uniques = pd.factorize(_as_str(series))
+    d = pd.Series(uniques, dtype=object).str.extract(_DATE_RE, expand=False)
+    parsed = pd.to_datetime(d, format="%d.%m.%Y", errors="coerce", cache=True).to_numpy()
+    # код -1 (пустая ячейка) попадает на добавленный в конец NaT
+    parsed = np.append(parsed, np.datetime64("NaT"))
+    return pd.Series(parsed[codes], index=series.index, name=series.name)
+
+
+def _contains_mask(values: np.ndarray, needle: str) -> np.ndarray:
+    """Поиск подстроки прямо по массиву строк, без .str и regex (не-строки → False)."""
+    if values.dtype.kind == "U":
+        # массив фиксированной ширины: поиск целиком в C
+        return np.char.find(values, needle) >= 0
+    return np.fromiter(
+        (isinstance(v, str) and needle in v for v in values),
+        dtype=bool,
+        count=len(values),
+    )
+
+
+def _column_values(
+    df: pd.DataFrame,
+    column: str,
+    rows: Optional[np.ndarray],
+    cache: dict,
+    kind: str,
+    build: Callable[[pd.Series], np.ndarray],
+) -> np.ndarray:
+    """
+    Производный массив колонки (строки в нижнем регистре, обрезанные строки...).
+
+    Для всего df результат кладём в cache под ключом (kind, column), так что
+    несколько условий по одной колонке строят его один раз; rows — позиции
+    строк, если таблица уже сужена.
+    """
+    key = (kind, column)
+    values = cache.get(key)
+    if values is None:
+        ser = df[column] if rows is None else df[column].iloc[rows]
+        built = build(ser)
+        if rows is not None:
+            return built
+        values = cache[key] = built
+    return values if rows is None else values[rows]
+
+
+def _lowered(ser: pd.Series) -> np.ndarray:
+    lowered = _as_str(ser).str.lower()
+    # короткий текст держим как массив фиксированной ширины для np.char.find,
+    # длинный (фабула и т.п.) — объектами, чтобы не раздувать память
+    if lowered.str.len().max() <= _FIXED_WIDTH_MAX:
+        return lowered.fillna("").to_numpy(dtype=str)
+    return lowered.to_numpy()
+
+
+def _stripped(ser: pd.Series) -> np.ndarray:
+    return _as_str(ser).str.strip().to_numpy()
+
+
+def _contains_condition(df, cond, rows, cache) -> np.ndarray:
+    # введённый текст — обычная подстрока, не regex
+    v = str(cond.value).lower()
+    return _contains_mask(_column_values(df, cond.column, rows, cache, "lower", _lowered), v)
+
+
+def _column_codes(df: pd.DataFrame, column: str, cache: dict) -> tuple:
+    """
+    Обрезанные строки колонки как целые коды: (коды, {значение: код}).
+
+    Для колонок с числом разных значений больше _CODED_MAX_UNIQUES
+    возвращает (None, None) — там сравниваем строками.
+    """
+    key = ("codes", column)
+    entry = cache.get(key)
+    if entry is None:
+        codes, uniques = pd.factorize(_column_values(df, column, None, cache, "strip", _stripped))
+        if len(uniques) <= _CODED_MAX_UNIQUES:
+            entry = (codes.astype(np.int8), {v: i for i, v in enumerate(uniques)})
+        else:
+            entry = (None, None)
+        cache[key] = entry
+    return entry
+
+
+def _equals_condition(df, cond, rows, cache) -> np.ndarray:
+    # делаем мягкое сравнение строками
+    target = str(cond.value).strip()
+    codes, code_of = _column_codes(df, cond.column, cache)
+    if codes is not None:
+        # сравниваем байтовые коды, а не строки; -2 не совпадает ни с чем
+        # (у пустых ячеек код -1)
+        values = codes if rows is None else codes[rows]
+        return values == code_of.get(target, -2)
+    values = _column_values(df, cond.column, rows, cache, "strip", _stripped)
+    return values == target
+
+
+def _not_equals_condition(df, cond, rows, cache) -> np.ndarray:
+    return ~_equals_condition(df, cond, rows, cache)
+
+
+def _parsed_dates(ser: pd.Series) -> np.ndarray:
+    return _to_datetime_series(ser).to_numpy()
+
+
+def _range_condition(df, cond, rows, cache) -> np.ndarray:
+    d_from, d_to = cond.value
+    if d_from is None and d_to is None:
+        return np.ones(len(df) if rows is None else len(rows), dtype=bool)
+    # regex + разбор дат — один раз на колонку, дальше только сравнения
+    dates = _column_values(df, cond.column, rows, cache, "dates", _parsed_dates)
+    if d_to is None:
+        return dates >= d_from
+    if d_from is None:
+        return dates <= d_to
+    mask = dates >= d_from
+    mask &= dates <= d_to
+    return mask
+
+
+# оператор -> функция (df, условие, позиции строк, кэш) -> булева маска
+OP_TABLE: dict[Operator, Callable[..., np.ndarray]] = {
+    Operator.CONTAINS: _contains_condition,
+    Operator.EQUALS: _equals_condition,
+    Operator.NOT_EQUALS: _not_equals_condition,
+    Operator.RANGE: _range_condition,
+}
+
+
+def _condition_mask(
+    df: pd.DataFrame,
+    cond: FilterCondition,
+    rows: Optional[np.ndarray],
+    cache: dict,
+) -> np.ndarray:
+    """Булева маска строк df (или только позиций rows) для одного условия."""
+    handler = OP_TABLE.get(cond.operator)
+    if handler is None:
+        return np.ones(len(df) if rows is None else len(rows), dtype=bool)
+    return handler(df, cond, rows, cache)
+
+
+def search_hits(df: pd.DataFrame, rows: np.ndarray, text: str, cache: dict) -> np.ndarray:
+    """
+    Глобальный поиск: для каждой позиции из rows — есть ли text (без учёта
+    регистра, как подстрока) хоть в одной колонке df.
+
+    Строки в нижнем регистре берутся из cache (те же, что у CONTAINS),
+    а каждая следующая колонка проверяется только по ещё не найденным строкам.
+    Скрытые service-колонки (is_archived/is_deleted) не ищутся.
+    """
+    needle = text.lower()
+    hits = np.zeros(len(rows), dtype=bool)
+    unique = df.columns.is_unique
+    for i, col in enumerate(df.columns):
+        if col in SERVICE_COLS:
+            continue
+        todo = np.flatnonzero(~hits)
+        if not len(todo):
+            break
+        if unique:
+            values = _column_values(df, col, None, cache, "lower", _lowered)
+        else:
+            # одинаковые заголовки (например, пустые из Word) — без кэша
+            values = _lowered(df.iloc[:, i])
+        hits[todo] = _contains_mask(values[rows[todo]], needle)
+    return hits
 
 
-def apply_filters(df: pd.DataFrame, conditions: list[FilterCondition]) -> pd.DataFrame:
-    out = df
+def _merge_ranges(conditions: list[FilterCondition]) -> list[FilterCondition]:
+    """
+    Несколько диапазонов по одной колонке сливаем в один (пересечение),
+    чтобы даты колонки разбирались и сравнивались один раз.
+    """
+    positions: dict[str, int] = {}
+    result: list[FilterCondition] = []
     for cond in conditions:
-        if cond.column not in out.columns:
+        if cond.operator != Operator.RANGE:
+            result.append(cond)
+            continue
+        pos = positions.get(cond.column)
+        if pos is None:
+            positions[cond.column] = len(result)
+            result.append(cond)
             continue
-        ser = out[cond.column]
 
-        if cond.operator == Operator.CONTAINS:
-            v = str(cond.value)
-            mask = ser.astype(str).str.contains(v, case=False, na=False)
-            out = out[mask]
+        (a_from, a_to), (b_from, b_to) = result[pos].value, cond.value
+        d_from = max((d for d in (a_from, b_from) if d is not None), default=None)
+        d_to = min((d for d in (a_to, b_to) if d is not None), default=None)
+        result[pos] = FilterCondition(column=cond.column, operator=Operator.RANGE, value=(d_from, d_to))
+    return result
+
+
+def filter_mask(
+    df: pd.DataFrame,
+    conditions: list[FilterCondition],
+    cache: Optional[dict] = None,
+) -> np.ndarray:
+    # маски всех условий считаем по исходному df и режем таблицу один раз;
+    # условия идут от дешёвых к дорогим, а когда строк остаётся мало —
+    # остальные условия считаем только по ним.
+    # cache — строковые представления и разобранные даты колонок; его
+    # можно передавать между вызовами для того же df (и сбрасывать,
+    # когда df меняется)
+    if cache is None:
+        cache = {}
+    mask = np.ones(len(df), dtype=bool)
+    rows = None
+    for cond in sorted(_merge_ranges(conditions), key=_condition_cost):
+        if cond.column not in df.columns:
+            continue
 
-        elif cond.operator == Operator.EQUALS:
-            v = cond.value
-            # делаем мягкое сравнение строками
-            mask = ser.astype(str).str.strip().eq(str(v).strip())
-            out = out[mask]
+        if rows is None:
+            np.logical_and(mask, _condition_mask(df, cond, None, cache), out=mask)
+            # один проход по маске: и для сужения, и для раннего выхода
+            remaining = np.count_nonzero(mask)
+            if remaining < _NARROW_FRACTION * len(df):
+                rows = np.flatnonzero(mask)
+        else:
+            sub_mask = _condition_mask(df, cond, rows, cache)
+            mask[rows] = sub_mask
+            rows = rows[sub_mask]
+            remaining = len(rows)
+
+        # ничего не осталось — остальные условия можно не считать
+        if not remaining:
+            break
+    return mask
 
-        elif cond.operator == Operator.NOT_EQUALS:
-            v = cond.value
-            mask = ~ser.astype(str).str.strip().eq(str(v).strip())
-            out = out[mask]
 
-        elif cond.operator == Operator.RANGE:
-            d_from, d_to = cond.value
-            dser = _to_datetime_series(ser)
-            mask = pd.Series(True, index=out.index)
-            if d_from is not None:
-                mask &= dser >= d_from
-            if d_to is not None:
-                mask &= dser <= d_to
-            out = out[mask]
+# меры пресечения, истёкшие до этой даты, не подсвечиваем
+EXPIRY_CUTOFF = pd.Timestamp(2025, 9, 1)
 
-    return out
+
+def _expiry_masks(
+    n: int,
+    dates5: pd.Series | None,
+    d7: pd.Series | None,
+    d8: pd.Series | None,
+    today: pd.Timestamp,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Маски (просрочено, истекает ≤10 дней, ОРС до 20 дней, ОРС просрочено)
+    по датам колонок 5/7/8; None — колонки нет. Годится и для всей
+    таблицы, и для одной отредактированной строки.
+    """
+    expired = np.zeros(n, dtype=bool)
+    expiring = np.zeros(n, dtype=bool)
+    warning = np.zeros(n, dtype=bool)
+    overdue = np.zeros(n, dtype=bool)
+
+    if dates5 is not None:
+        expiry_dates = dates5 + pd.DateOffset(months=6)
+        # маски по всей колонке сразу (NaT даёт NaN дней — не попадает
+        # ни в одно сравнение)
+        days_left = (expiry_dates - today).dt.days
+        valid = (expiry_dates >= EXPIRY_CUTOFF).to_numpy()
+        expired = valid & (days_left < 0).to_numpy()
+        expiring = valid & days_left.between(0, 10).to_numpy()
+
+    if d7 is not None and d8 is not None:
+        # поручение есть, а ОРС ещё не заведено
+        days_passed = (today - d7).dt.days
+        pending = (d7.notna() & d8.isna()).to_numpy()
+        warning = pending & days_passed.between(0, 20).to_numpy()
+        overdue = pending & (days_passed > 20).to_numpy()
+
+    return expired, expiring, warning, overdue
 
 
 # ============================================================
 #                     МОДЕЛЬ ДЛЯ QTableView
 # ============================================================
 
+# Цвета подсветки создаём один раз: data() отдаёт их на каждую клетку
+_BG_ARCHIVED = QColor("#d6f5d6")
+_BG_DELETED = QColor("#eeeeee")
+_BG_EXPIRED = QColor("#ffb3b3")
+_BG_DUP = QColor("#cfe8ff")
+_BG_YELLOW = QColor("#fff2a8")
+
+# Фон всего ряда по коду из PandasTableModel._row_bg (0 — без подсветки)
+_ROW_BG = (None, _BG_ARCHIVED, _BG_DELETED, _BG_EXPIRED, _BG_DUP)
+# Фон клеток ОРС по коду из PandasTableModel._row_ors (просрочено, предупреждение)
+_ORS_BG = (None, _BG_EXPIRED, _BG_YELLOW)
+
+
+def _display_values(ser: pd.Series):
+    """
+    Значения колонки для DisplayRole.
+
+    Текстовые колонки отдаются как есть (без копии) — элементы уже строки.
+    Даты и числа переводятся в строки один раз здесь, а не str() на
+    каждую клетку при каждой перерисовке; пропуски — пустая строка.
+    """
+    if ser.dtype == object or pd.api.types.is_string_dtype(ser):
+        return ser.array
+    if pd.api.types.is_datetime64_any_dtype(ser):
+        return ser.dt.strftime("%d.%m.%Y").fillna("").to_numpy(dtype=object)
+    strs = ser.astype(str).to_numpy(dtype=object)
+    strs[ser.isna().to_numpy()] = ""
+    return strs
+
+
+# подсветка строк: множество меток или bool-маска по позициям строк df модели
+RowMarks = Set[Any] | np.ndarray
+
+
 class PandasTableModel(QAbstractTableModel):
     def __init__(
         self,
         df: pd.DataFrame,
         edit_callback=None,
-        expiring_by5_indices: Optional[Set[Any]] = None,
-        expired_indices: Optional[Set[Any]] = None,
-        duplicate_indices: Optional[Set[Any]] = None,
-        ors_warning_indices: Optional[Set[Any]] = None,
-        ors_overdue_indices: Optional[Set[Any]] = None,
+        expiring_by5_indices: Optional[RowMarks] = None,
+        expired_indices: Optional[RowMarks] = None,
+        duplicate_indices: Optional[RowMarks] = None,
+        ors_warning_indices: Optional[RowMarks] = None,
+        ors_overdue_indices: Optional[RowMarks] = None,
         col5_name: str | None = None,
         col7_name: str | None = None,
         col8_name: str | None = None,
@@ -178,39 +595,199 @@ class PandasTableModel(QAbstractTableModel):
         self.df = df if df is not None else pd.DataFrame()
         self.edit_callback = edit_callback
 
-        self.expiring_by5_indices = expiring_by5_indices or set()
-        self.expired_indices = expired_indices or set()
-        self.duplicate_indices = duplicate_indices or set()
-        self.ors_warning_indices = ors_warning_indices or set()
-        self.ors_overdue_indices = ors_overdue_indices or set()
-
-        self.col5_name = col5_name
-        self.col7_name = col7_name
-        self.col8_name = col8_name
+        self._set_highlights(
+            expiring_by5_indices, expired_indices, duplicate_indices,
+            ors_warning_indices, ors_overdue_indices,
+            col5_name, col7_name, col8_name,
+        )
+        self._precompute_rows()
 
     def update_df(
         self,
         df: pd.DataFrame,
-        expiring_by5_indices: Optional[Set[Any]] = None,
-        expired_indices: Optional[Set[Any]] = None,
-        duplicate_indices: Optional[Set[Any]] = None,
-        ors_warning_indices: Optional[Set[Any]] = None,
-        ors_overdue_indices: Optional[Set[Any]] = None,
+        expiring_by5_indices: Optional[RowMarks] = None,
+        expired_indices: Optional[RowMarks] = None,
+        duplicate_indices: Optional[RowMarks] = None,
+        ors_warning_indices: Optional[RowMarks] = None,
+        ors_overdue_indices: Optional[RowMarks] = None,
         col5_name: str | None = None,
         col7_name: str | None = None,
         col8_name: str | None = None,
     ):
-        self.beginResetModel()
-        self.df = df if df is not None else pd.DataFrame()
-        self.expiring_by5_indices = expiring_by5_indices or set()
-        self.expired_indices = expired_indices or set()
-        self.duplicate_indices = duplicate_indices or set()
-        self.ors_warning_indices = ors_warning_indices or set()
-        self.ors_overdue_indices = ors_overdue_indices or set()
+        df = df if df is not None else pd.DataFrame()
+
+        # Те же колонки (обычная фильтрация) — меняется только набор строк:
+        # вместо полного reset делаем layoutChanged, чтобы вид сохранил
+        # выделение/текущую ячейку и ширины колонок.
+        same_columns = self.df is not None and self.df.columns.equals(df.columns)
+        # Те же и строки (фильтр не изменил выборку, правка значений) —
+        # хватает dataChanged по всей таблице, без перестановки строк.
+        same_rows = same_columns and self.df.index.equals(df.index)
+        if same_columns and not same_rows:
+            self.layoutAboutToBeChanged.emit()
+        elif not same_columns:
+            self.beginResetModel()
+
+        old_index = self.df.index if self.df is not None else None
+        self.df = df
+        self._set_highlights(
+            expiring_by5_indices, expired_indices, duplicate_indices,
+            ors_warning_indices, ors_overdue_indices,
+            col5_name, col7_name, col8_name,
+        )
+        self._precompute_rows()
+
+        if same_rows:
+            if self.rowCount() and self.columnCount():
+                self.dataChanged.emit(
+                    self.index(0, 0),
+                    self.index(self.rowCount() - 1, self.columnCount() - 1),
+                    [Qt.DisplayRole, Qt.BackgroundRole],
+                )
+        elif same_columns:
+            self._remap_persistent_indexes(old_index)
+            self.layoutChanged.emit()
+        else:
+            self.endResetModel()
+
+    def update_highlights(
+        self,
+        expiring_by5_indices: Optional[RowMarks] = None,
+        expired_indices: Optional[RowMarks] = None,
+        duplicate_indices: Optional[RowMarks] = None,
+        ors_warning_indices: Optional[RowMarks] = None,
+        ors_overdue_indices: Optional[RowMarks] = None,
+        col5_name: str | None = None,
+        col7_name: str | None = None,
+        col8_name: str | None = None,
+    ):
+        """
+        Поменять только подсветку при тех же строках: вид перерисовывает
+        фон клеток (dataChanged), без перестройки строк, как в update_df.
+        """
+        self._set_highlights(
+            expiring_by5_indices, expired_indices, duplicate_indices,
+            ors_warning_indices, ors_overdue_indices,
+            col5_name, col7_name, col8_name,
+        )
+        self._precompute_highlights()
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(self.rowCount() - 1, self.columnCount() - 1),
+                [Qt.BackgroundRole],
+            )
+
+    def _set_highlights(
+        self,
+        expiring_by5_indices, expired_indices, duplicate_indices,
+        ors_warning_indices, ors_overdue_indices,
+        col5_name, col7_name, col8_name,
+    ):
+        # снимки множеств/масок: битовые маски рядов строятся по ним один раз,
+        # и дальнейшие правки в MainWindow их не рассинхронизируют
+        def snapshot(marks):
+            if isinstance(marks, np.ndarray):
+                return marks.astype(bool, copy=True)
+            return frozenset(marks if marks is not None else ())
+
+        self.expiring_by5_indices = snapshot(expiring_by5_indices)
+        self.expired_indices = snapshot(expired_indices)
+        self.duplicate_indices = snapshot(duplicate_indices)
+        self.ors_warning_indices = snapshot(ors_warning_indices)
+        self.ors_overdue_indices = snapshot(ors_overdue_indices)
         self.col5_name = col5_name
         self.col7_name = col7_name
         self.col8_name = col8_name
-        self.endResetModel()
+
+    def _precompute_rows(self):
+        """
+        Метки строк, имена колонок и значения по позициям df:
+        data()/flags()/headerData() берут их из массивов и списков, а не из
+        pandas Index и df.iloc на каждую клетку.
+        """
+        df = self.df
+        self._index_arr = df.index.to_numpy()
+        # подписи строк для вертикального заголовка — без str() на каждый вызов
+        self._index_strs = df.index.astype(str).to_numpy()
+        self._col_names = [str(col) for col in df.columns]
+        # service-колонки не редактируются: проверка в flags()/setData() по номеру
+        self._editable_cols = [name not in SERVICE_COLS for name in self._col_names]
+        # массивы значений колонок (текст — без копии): клетка для DisplayRole
+        # берётся как arrays[c][r] вместо df.iloc[r, c]
+        self._col_arrays = [_display_values(df.iloc[:, j]) for j in range(df.shape[1])]
+        self._precompute_highlights()
+
+    def _precompute_highlights(self):
+        """Коды подсветки по позициям строк вместо df.at и множеств на каждую клетку."""
+        df = self.df
+        n = len(df)
+        # позиции 5-й и 7/8-й колонок: в data() сравниваем номер, а не имя
+        self._col5_cols = tuple(
+            i for i, name in enumerate(self._col_names) if self.col5_name and name == self.col5_name
+        )
+        ors_names = (self.col7_name, self.col8_name) if self.col7_name and self.col8_name else ()
+        self._ors_cols = tuple(i for i, name in enumerate(self._col_names) if name in ors_names)
+
+        def flag_column(name: str) -> np.ndarray:
+            if name not in df.columns:
+                return np.zeros(n, dtype=bool)
+            return df[name].to_numpy(dtype=bool, na_value=False)
+
+        int_labels = self._index_arr.dtype.kind in "iu"
+
+        def in_set(indices) -> np.ndarray:
+            if isinstance(indices, np.ndarray):
+                # маска по позициям уже готова — без поиска меток
+                return indices
+            if not indices:
+                return np.zeros(n, dtype=bool)
+            if int_labels:
+                # целые метки (обычный случай) — np.isin по int-массивам
+                # в разы быстрее хэширования каждой метки в Index.isin
+                try:
+                    labels = np.fromiter(indices, dtype=np.int64, count=len(indices))
+                except (TypeError, ValueError, OverflowError):
+                    pass
+                else:
+                    return np.isin(self._index_arr, labels)
+            return df.index.isin(indices)
+
+        def codes(*masks: np.ndarray) -> np.ndarray:
+            # код строки — номер первой сработавшей маски (1, 2, ...), 0 — ни
+            # одной; пишем с конца, чтобы более важная подсветка легла поверх
+            result = np.zeros(n, dtype=np.int8)
+            for code in range(len(masks), 0, -1):
+                result[masks[code - 1]] = code
+            return result
+
+        # приоритет цветов: архив, удалённые, просрочка, дубликат
+        self._row_bg = codes(
+            flag_column("is_archived"),
+            flag_column("is_deleted"),
+            in_set(self.expired_indices),
+            in_set(self.duplicate_indices),
+        )
+        self._row_expiring5 = in_set(self.expiring_by5_indices)
+        self._row_ors = codes(in_set(self.ors_overdue_indices), in_set(self.ors_warning_indices))
+        # у большинства рядов подсветки нет — для них data() выходит сразу
+        self._row_any_hl = (self._row_bg != 0) | self._row_expiring5 | (self._row_ors != 0)
+
+    def _remap_persistent_indexes(self, old_index: pd.Index):
+        """Перенести persistent-индексы вида на те же записи (по метке строки)."""
+        old_list = self.persistentIndexList()
+        if not old_list:
+            return
+        labels = [old_index[i.row()] for i in old_list]
+        if self.df.index.is_unique:
+            new_rows = self.df.index.get_indexer(labels)
+        else:
+            new_rows = [-1] * len(labels)
+        new_list = [
+            self.index(int(row), old.column()) if row >= 0 else QModelIndex()
+            for old, row in zip(old_list, new_rows)
+        ]
+        self.changePersistentIndexList(old_list, new_list)
 
     def rowCount(self, parent=QModelIndex()):
         return 0 if self.df is None else len(self.df.index)
@@ -221,85 +798,55 @@ class PandasTableModel(QAbstractTableModel):
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role != Qt.DisplayRole or self.df is None:
             return None
-        if orientation == Qt.Horizontal:
-            try:
-                return str(self.df.columns[section])
-            except Exception:
-                return ""
-        else:
-            try:
-                return str(self.df.index[section])
-            except Exception:
-                return ""
+        labels = self._col_names if orientation == Qt.Horizontal else self._index_strs
+        return labels[section] if 0 <= section < len(labels) else ""
 
     def flags(self, index: QModelIndex):
         if not index.isValid():
             return Qt.NoItemFlags
         base = Qt.ItemIsSelectable | Qt.ItemIsEnabled
-        if self.edit_callback is not None:
-            # запретим редактировать service-колонки
-            col_name = str(self.df.columns[index.column()])
-            if col_name not in SERVICE_COLS:
-                base |= Qt.ItemIsEditable
+        if self.edit_callback is not None and self._editable_cols[index.column()]:
+            # service-колонки редактировать запрещено
+            base |= Qt.ItemIsEditable
         return base
 
     def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        # отдаём только текст и фон; остальные роли Qt спрашивает на каждой
+        # отрисовке — для них не лезем в df
+        if role not in (Qt.DisplayRole, Qt.BackgroundRole):
+            return None
         if not index.isValid() or self.df is None:
             return None
 
         r = index.row()
         c = index.column()
 
-        try:
-            orig_index = self.df.index[r]
-            col_name = str(self.df.columns[c])
-            val = self.df.iloc[r, c]
-        except Exception:
-            return None
-
         if role == Qt.DisplayRole:
+            if not (0 <= c < len(self._col_arrays) and 0 <= r < len(self._index_arr)):
+                return None
+            val = self._col_arrays[c][r]
             if pd.isna(val):
                 return ""
             return str(val)
 
         # ----------- подсветка -----------
-        if role == Qt.BackgroundRole:
-            # Архив - зелёный весь ряд
-            if "is_archived" in self.df.columns:
-                try:
-                    if bool(self.df.at[orig_index, "is_archived"]):
-                        return QColor("#d6f5d6")
-                except Exception:
-                    pass
-
-            # Удалённые - серый ряд (если вдруг показывают)
-            if "is_deleted" in self.df.columns:
-                try:
-                    if bool(self.df.at[orig_index, "is_deleted"]):
-                        return QColor("#eeeeee")
-                except Exception:
-                    pass
-
-            # Просрочка по 5-й колонке - красный весь ряд
-            if orig_index in self.expired_indices:
-                return QColor("#ffb3b3")
+        # (коды рядов посчитаны в _precompute_highlights)
+        if not 0 <= r < len(self._row_bg) or not self._row_any_hl[r]:
+            return None
 
-            # Дубликат ПІБ - синий весь ряд
-            if orig_index in self.duplicate_indices:
-                return QColor("#cfe8ff")
+        # Архив - зелёный, удалённые - серый, просрочка по 5-й колонке -
+        # красный, дубликат ПІБ - синий: весь ряд
+        row_code = self._row_bg[r]
+        if row_code:
+            return _ROW_BG[row_code]
 
-            # Жёлтая клетка в 5-й колонке
-            if self.col5_name and orig_index in self.expiring_by5_indices:
-                if col_name == self.col5_name:
-                    return QColor("#fff2a8")
+        # Жёлтая клетка в 5-й колонке
+        if c in self._col5_cols and self._row_expiring5[r]:
+            return _BG_YELLOW
 
-            # ОРС warning/overdue: подсветка клеток в 7 и 8
-            if self.col7_name and self.col8_name:
-                if col_name in (self.col7_name, self.col8_name):
-                    if orig_index in self.ors_overdue_indices:
-                        return QColor("#ffb3b3")
-                    if orig_index in self.ors_warning_indices:
-                        return QColor("#fff2a8")
+        # ОРС warning/overdue: подсветка клеток в 7 и 8
+        if c in self._ors_cols:
+            return _ORS_BG[self._row_ors[r]]
 
         return None
 
@@ -309,25 +856,35 @@ class PandasTableModel(QAbstractTableModel):
 
         r = index.row()
         c = index.column()
-        try:
-            orig_index = self.df.index[r]
-            col_name = str(self.df.columns[c])
-        except Exception:
+        if not (0 <= r < len(self._index_arr) and 0 <= c < len(self._col_names)):
             return False
-
-        if col_name in SERVICE_COLS:
+        if not self._editable_cols[c]:
             return False
+        orig_index = self._index_arr[r]
+        col_name = self._col_names[c]
 
         new_val = "" if value is None else str(value)
 
-        # обновим df текущий
+        # редактор закрыли без изменений — не гоняем пересчёт, сохранение
+        # состояния и фильтрацию ради того же значения
+        current = self._col_arrays[c][r]
+        if not pd.isna(current) and str(current) == new_val:
+            return False
+
+        # обновим df текущий (колонка могла замениться новым массивом)
         self.df.iat[r, c] = new_val
+        self._col_arrays[c] = _display_values(self.df.iloc[:, c])
 
         # колбэк — синхронизировать с df_original в MainWindow
         if self.edit_callback:
             self.edit_callback(orig_index, col_name, new_val)
 
-        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.BackgroundRole])
+        # фон от правки может смениться только в колонках дат (5, 7, 8)
+        # и в ПІБ (дубликаты); в остальных перерисовываем лишь текст
+        roles = [Qt.DisplayRole]
+        if col_name in (self.col5_name, self.col7_name, self.col8_name) or "ПІБ" in col_name:
+            roles.append(Qt.BackgroundRole)
+        self.dataChanged.emit(index, index, roles)
         return True
 
 
@@ -335,6 +892,25 @@ class PandasTableModel(QAbstractTableModel):
 #                 ДІАЛОГ ДОДАВАННЯ РЯДКА
 # ============================================================
 
+# Поля формы: (ключ в get_data, подпись, подсказка).
+# Подсказка None — выпадающий список прокуратур, иначе QLineEdit.
+_FIELDS = [
+    ("prosecutor", "Прокуратура:", None),
+    ("case_info", "№ провадження / кваліфікація:", "№ провадження, дата, кваліфікація, орган…"),
+    ("fabula", "Фабула:", "Коротка фабула…"),
+    ("pib", "ПІБ підозрюваного:", "Прізвище Ім'я По батькові"),
+    ("dob", "Дата народження:", "дд.мм.рррр"),
+    ("notice_date", "Дата повідомлення підозри:", "дд.мм.рррр"),
+    ("measure", "Запобіжний захід:", "Тримання під вартою / застава / ухвала …"),
+    ("stop_info", "Зупинення розслідування:", "Підстава, дата зупинення…"),
+    ("order_info", "Доручення / клопотання:", "Дата, вих. №, слідчий, адресат…"),
+    ("ors_info", "№ ОРС:", "№ ОРС, дата заведення, категорія, орган…"),
+    ("border_info", "Перетин кордону:", "Так/Ні, дата отримання інформації…"),
+    ("admin_info", "Адмін. відповідальність:", "Так/Ні, стаття, дата…"),
+    ("interpol_info", "Міжнародний розшук:", "Дата оголошення, № картки Інтерполу…"),
+]
+
+
 class AddRowDialog(QDialog):
     def __init__(self, prosecutors: list[str] | None = None, parent=None):
         super().__init__(parent)
@@ -344,59 +920,18 @@ class AddRowDialog(QDialog):
         prosecutors = prosecutors or []
         layout = QFormLayout(self)
 
-        self.prosecutor_cb = QComboBox(self)
-        self.prosecutor_cb.addItem("")
-        for p in sorted(prosecutors):
-            self.prosecutor_cb.addItem(str(p))
-        layout.addRow("Прокуратура:", self.prosecutor_cb)
-
-        self.case_edit = QLineEdit(self)
-        self.case_edit.setPlaceholderText("№ провадження, дата, кваліфікація, орган…")
-        layout.addRow("№ провадження / кваліфікація:", self.case_edit)
-
-        self.fabula_edit = QLineEdit(self)
-        self.fabula_edit.setPlaceholderText("Коротка фабула…")
-        layout.addRow("Фабула:", self.fabula_edit)
-
-        self.pib_edit = QLineEdit(self)
-        self.pib_edit.setPlaceholderText("Прізвище Ім'я По батькові")
-        layout.addRow("ПІБ підозрюваного:", self.pib_edit)
-
-        self.dob_edit = QLineEdit(self)
-        self.dob_edit.setPlaceholderText("дд.мм.рррр")
-        layout.addRow("Дата народження:", self.dob_edit)
-
-        self.notice_date_edit = QLineEdit(self)
-        self.notice_date_edit.setPlaceholderText("дд.мм.рррр")
-        layout.addRow("Дата повідомлення підозри:", self.notice_date_edit)
-
-        self.measure_edit = QLineEdit(self)
-        self.measure_edit.setPlaceholderText("Тримання під вартою / застава / ухвала …")
-        layout.addRow("Запобіжний захід:", self.measure_edit)
-
-        self.stop_edit = QLineEdit(self)
-        self.stop_edit.setPlaceholderText("Підстава, дата зупинення…")
-        layout.addRow("Зупинення розслідування:", self.stop_edit)
-
-        self.order_edit = QLineEdit(self)
-        self.order_edit.setPlaceholderText("Дата, вих. №, слідчий, адресат…")
-        layout.addRow("Доручення / клопотання:", self.order_edit)
-
-        self.ors_edit = QLineEdit(self)
-        self.ors_edit.setPlaceholderText("№ ОРС, дата заведення, категорія, орган…")
-        layout.addRow("№ ОРС:", self.ors_edit)
-
-        self.border_edit = QLineEdit(self)
-        self.border_edit.setPlaceholderText("Так/Ні, дата отримання інформації…")
-        layout.addRow("Перетин кордону:", self.border_edit)
-
-        self.admin_edit = QLineEdit(self)
-        self.admin_edit.setPlaceholderText("Так/Ні, стаття, дата…")
-        layout.addRow("Адмін. відповідальність:", self.admin_edit)
-
-        self.interpol_edit = QLineEdit(self)
-        self.interpol_edit.setPlaceholderText("Дата оголошення, № картки Інтерполу…")
-        layout.addRow("Міжнародний розшук:", self.interpol_edit)
+        self._edits: dict[str, QLineEdit | QComboBox] = {}
+        for key, label, placeholder in _FIELDS:
+            if placeholder is None:
+                widget = QComboBox(self)
+                # одним addItems, без повторов и пустых (пустой пункт — первый)
+                widget.addItems(["", *sorted({str(p) for p in prosecutors if p})])
+            else:
+                widget = QLineEdit(self)
+                widget.setPlaceholderText(placeholder)
+            self._edits[key] = widget
+            layout.addRow(label, widget)
+        self.prosecutor_cb = self._edits["prosecutor"]
 
         btn_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
         btn_box.accepted.connect(self.accept)
@@ -405,19 +940,8 @@ class AddRowDialog(QDialog):
 
     def get_data(self) -> dict[str, str]:
         return {
-            "prosecutor": self.prosecutor_cb.currentText().strip(),
-            "case_info": self.case_edit.text().strip(),
-            "fabula": self.fabula_edit.text().strip(),
-            "pib": self.pib_edit.text().strip(),
-            "dob": self.dob_edit.text().strip(),
-            "notice_date": self.notice_date_edit.text().strip(),
-            "measure": self.measure_edit.text().strip(),
-            "stop_info": self.stop_edit.text().strip(),
-            "order_info": self.order_edit.text().strip(),
-            "ors_info": self.ors_edit.text().strip(),
-            "border_info": self.border_edit.text().strip(),
-            "admin_info": self.admin_edit.text().strip(),
-            "interpol_info": self.interpol_edit.text().strip(),
+            key: (w.currentText() if isinstance(w, QComboBox) else w.text()).strip()
+            for key, w in self._edits.items()
         }
 
 
@@ -425,6 +949,75 @@ class AddRowDialog(QDialog):
 #        ДІАЛОГ АНАЛІЗУ ЗБІГІВ З ІНШИМ ДОКУМЕНТОМ
 # ============================================================
 
+# Нормализация ПІБ для поиска по документу: невидимые пробелы -> пробел,
+# латинские визуальные двойники -> кириллица; таблица и regex — один раз
+_PIB_TRANS = str.maketrans({
+    "\u00A0": " ", "\u200B": " ", "\u202F": " ", "\ufeff": " ",
+    "A": "А", "a": "а",
+    "B": "В",
+    "C": "С", "c": "с",
+    "E": "Е", "e": "е",
+    "H": "Н",
+    "I": "І", "i": "і",
+    "K": "К",
+    "M": "М",
+    "O": "О", "o": "о",
+    "P": "Р", "p": "р",
+    "T": "Т",
+    "X": "Х", "x": "х",
+    "Y": "У", "y": "у",
+})
+_PIB_APOS_RE = re.compile(r"[’ʼ'`´\-–—−‐]")
+_PIB_NONWORD_RE = re.compile(r"[^\w\s]")
+_PIB_WS_RE = re.compile(r"\s+")
+# сколько ПІБ собирать в одно регулярное выражение для подсветки
+_PIB_HIGHLIGHT_BATCH = 500
+# номер ОРС в ячейке таблицы: первые 5–10 цифр подряд
+_ORS_NUM_RE = re.compile(r"(\d{5,10})")
+# цифровые серии в тексте документа
+_DIGITS_RE = re.compile(r"\d+")
+# цифры, разбитые одиночными пробелами в пределах строки: "123 456 78"
+_SPACED_DIGITS_RE = re.compile(r"\d+(?:[^\S\n]\d+)+")
+
+
+def _count_numbers_in_runs(runs: list[str], nums: set[str]) -> dict[str, int]:
+    """
+    Сколько раз каждый номер из nums встречается в цифровых сериях runs
+    (как str.count по тексту: номер из цифр не выходит за свою серию).
+    Повторяющиеся серии проверяются один раз.
+    """
+    lengths = {len(n) for n in nums}
+    counts: dict[str, int] = {}
+    for run, mult in Counter(runs).items():
+        found = {run[i:i + ln] for ln in lengths for i in range(len(run) - ln + 1)} & nums
+        for num in found:
+            counts[num] = counts.get(num, 0) + run.count(num) * mult
+    return counts
+
+
+def _count_spaced_numbers(text: str, nums: set[str]) -> dict[str, int]:
+    """
+    Номера из nums, записанные в тексте с пробелами внутри ("123 456").
+
+    Совпадением считается склейка нескольких соседних групп цифр целиком,
+    без обрезки групп: так "2020 123 456" даёт 123456, но случайные
+    куски на стыке года и номера не находятся.
+    """
+    max_len = max(map(len, nums), default=0)
+    counts: dict[str, int] = {}
+    for spaced in _SPACED_DIGITS_RE.findall(text):
+        groups = spaced.split()
+        for i in range(len(groups)):
+            joined = groups[i]
+            for group in groups[i + 1:]:
+                joined += group
+                if len(joined) > max_len:
+                    break
+                if joined in nums:
+                    counts[joined] = counts.get(joined, 0) + 1
+    return counts
+
+
 class MatchAnalysisDialog(QDialog):
     def __init__(self, parent=None, current_df: pd.DataFrame | None = None):
         super().__init__(parent)
@@ -434,15 +1027,26 @@ class MatchAnalysisDialog(QDialog):
         self.current_df = current_df
         self.left_df: pd.DataFrame | None = None
         self.right_text: str = ""
+        # нормализованные непустые строки документа, они же одной строкой,
+        # и номера строк по встречающимся в них датам (_rebuild_right_indices)
+        self._norm_lines: list[str] = []
+        self._norm_doc: str = ""
+        self._lines_by_date: dict[str, list[int]] = {}
         self.right_df: pd.DataFrame | None = None
+        # колонки right_df в нижнем регистре — для поиска строки по имени
+        self._right_cols_lower: list[pd.Series] = []
 
         self.pib_matches: list[tuple[int, str]] = []
-        self.pib_unique_rows: pd.DataFrame | None = None
+        # строки без совпадений храним метками: сами строки нужны только
+        # для экспорта и выбираются из left_df в export_unique_rows
+        self._pib_unique_idx: pd.Index | None = None
 
         self.ors_matches: list[tuple[int, str]] = []
-        self.ors_unique_rows: pd.DataFrame | None = None
+        self._ors_unique_idx: pd.Index | None = None
 
         self._unique_pos_index: dict[tuple[str, str], int] = {}
+        # подсвеченные участки правого текста (start, end) — снимаем только их
+        self._highlight_ranges: list[tuple[int, int]] = []
         self.current_mode: str = "pib"
 
         top = QHBoxLayout()
@@ -591,7 +1195,9 @@ class MatchAnalysisDialog(QDialog):
     # -------------------- ЛЕВАЯ ТАБЛИЦА --------------------
 
     def set_left_df(self, df: pd.DataFrame):
-        self.left_df = df.copy()
+        # без копии: диалог модальный и left_df только читает (модель без
+        # правки, экспорт копирует в _format_df_for_export)
+        self.left_df = df
         model = PandasTableModel(self.left_df, edit_callback=None)
         self.left_table.setModel(model)
         self.left_table.horizontalHeader().setStretchLastSection(True)
@@ -647,11 +1253,8 @@ class MatchAnalysisDialog(QDialog):
         if col_patron:
             parts.append(df[col_patron].astype(str).str.strip())
 
-        result = parts[0]
-        for ser in parts[1:]:
-            result = result + " " + ser
-
-        return result.str.replace(r"\s+", " ", regex=True).str.strip()
+        result = parts[0].str.cat(parts[1:], sep=" ", na_rep="")
+        return result.str.replace(_PIB_WS_RE, " ", regex=True).str.strip()
 
     def _get_ors_series(self) -> pd.Series | None:
         if self.left_df is None:
@@ -668,11 +1271,22 @@ class MatchAnalysisDialog(QDialog):
 
         ors_col = find_ors_col()
         if ors_col:
-            base = df[ors_col].astype(str)
+            extracted = df[ors_col].astype(str).str.extract(_ORS_NUM_RE, expand=False).fillna("")
         else:
-            base = df.astype(str).agg(" ".join, axis=1)
+            # Колонки ОРС нет — первый номер в строке, по колонкам слева
+            # направо (как в склейке строки через пробел). Строки, где номер
+            # уже найден, в следующих колонках не проверяются.
+            extracted = pd.Series("", index=df.index, dtype=object)
+            todo = np.ones(len(df), dtype=bool)
+            for j in range(df.shape[1]):
+                if not todo.any():
+                    break
+                found = df.iloc[todo, j].astype(str).str.extract(_ORS_NUM_RE, expand=False)
+                hit = found.notna().to_numpy()
+                pos = np.flatnonzero(todo)[hit]
+                extracted.iloc[pos] = found[hit].to_numpy()
+                todo[pos] = False
 
-        extracted = base.str.extract(r"(\d{5,10})", expand=False).fillna("")
         if extracted.eq("").all():
             return None
         return extracted
@@ -697,11 +1311,14 @@ class MatchAnalysisDialog(QDialog):
 
             elif ext in (".csv", ".xlsx"):
                 if ext == ".csv":
-                    df = pd.read_csv(path, dtype=str, sep=None, engine="python").fillna("")
+                    df = pd.read_csv(path, dtype=str, sep=_sniff_csv_sep(path), engine="c").fillna("")
                 else:
                     df = pd.read_excel(path, dtype=str).fillna("")
                 table = df
-                rows = df.apply(lambda r: " ".join(r.values.astype(str)), axis=1)
+                # строки таблицы текстом: одна склейка колонок через str.cat
+                # вместо Python-лямбды на каждую строку
+                cols = [df.iloc[:, j].astype(str) for j in range(df.shape[1])]
+                rows = cols[0].str.cat(cols[1:], sep=" ") if cols else []
                 text = "\n".join(rows)
 
             elif ext == ".docx":
@@ -721,9 +1338,10 @@ class MatchAnalysisDialog(QDialog):
                             parts.append(row_text)
 
                 if rows_all:
-                    maxc = max(len(r) for r in rows_all)
-                    norm = [r + [""] * (maxc - len(r)) for r in rows_all]
-                    table = pd.DataFrame(norm, columns=[f"Col {i+1}" for i in range(maxc)])
+                    # короткие строки pandas добивает пропусками сам — без
+                    # второй, выровненной копии всех ячеек
+                    table = pd.DataFrame(rows_all).fillna("")
+                    table.columns = [f"Col {i+1}" for i in range(table.shape[1])]
 
                 text = "\n".join(parts)
 
@@ -731,9 +1349,18 @@ class MatchAnalysisDialog(QDialog):
                 raise ValueError("Формат не підтримується")
 
             self.right_text = text or ""
+            self._rebuild_right_indices()
+            # setPlainText берёт текущий формат курсора (после подсветки он
+            # цветной); сбрасываем, иначе весь новый текст будет с фоном
+            self.right_text_edit.setCurrentCharFormat(QTextCharFormat())
             self.right_text_edit.setPlainText(self.right_text)
+            self._highlight_ranges.clear()
 
             self.right_df = table
+            self._right_cols_lower = (
+                [] if table is None
+                else [table.iloc[:, j].astype(str).str.lower() for j in range(table.shape[1])]
+            )
             if table is not None:
                 model = PandasTableModel(table, edit_callback=None)
                 self.right_table.setModel(model)
@@ -747,6 +1374,28 @@ class MatchAnalysisDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Помилка", str(e))
 
+    def _rebuild_right_indices(self):
+        """
+        Індекси правого документа для пошуку ПІБ: будуються один раз при
+        завантаженні, а не при кожному натисканні "Знайти збіги".
+        """
+        raw_lines = [ln.strip() for ln in self.right_text.splitlines() if ln.strip()]
+        self._norm_lines = self._normalize_series(raw_lines).tolist()
+
+        # Весь нормализованный документ одной строкой: вхождения ПІБ без даты
+        # считает один str.count в C, а не цикл Python по строкам. В
+        # нормализованных строках и ПІБ нет "\n", так что через границу
+        # строк совпадение не склеится — счёт тот же, что по строкам.
+        self._norm_doc = "\n".join(self._norm_lines)
+
+        # Номера строк по датам, которые в них есть (с перекрытиями —
+        # как проверка "dob in raw_ln"): ПІБ с датой рождения ищется
+        # только в строках с этой датой.
+        self._lines_by_date = {}
+        for i, raw_ln in enumerate(raw_lines):
+            for date in set(_DATE_OVERLAP_RE.findall(raw_ln)):
+                self._lines_by_date.setdefault(date, []).append(i)
+
     # -------------------- ВКЛАДКИ НИЗУ --------------------
 
     def on_bottom_tab_changed(self, index: int):
@@ -754,57 +1403,29 @@ class MatchAnalysisDialog(QDialog):
 
     # -------------------- НОРМАЛИЗАЦИЯ (ИСПРАВЛЕНО) --------------------
 
-    def _extract_dob_safe(self, text: str) -> str:
-        """Витягує дату у форматі дд.мм.рррр. Повертає '' якщо немає."""
-        if text is None:
-            return ""
-        s = str(text).strip()
-        if not s or s in ("-", "—"):
-            return ""
-        m = re.search(r"\d{2}\.\d{2}\.\d{4}", s)
-        return m.group(0) if m else ""
-
-    def _normalize_pib_flexible(self, value: str) -> str:
+    def _normalize_series(self, values) -> pd.Series:
         """
-        Гнучка нормалізація ПІБ:
+        Гнучка нормалізація ПІБ і рядків документа:
         - прибирає апострофи/тире/пунктуацію
         - прибирає невидимі пробіли
         - вирівнює латиницю↔кирилицю (візуальні двійники)
         - casefold
+
+        Кожен крок — один виклик .str по всіх значеннях разом; однакові
+        значення (повтори ПІБ, шапки в документі) нормалізуються один раз.
+        None дає "".
         """
-        if value is None:
-            return ""
-        s = str(value)
-
-        s = unicodedata.normalize("NFKC", s)
-
-        for sp in ("\u00A0", "\u200B", "\u202F", "\ufeff"):
-            s = s.replace(sp, " ")
-
-        s = s.translate(str.maketrans({
-            "A": "А", "a": "а",
-            "B": "В",
-            "C": "С", "c": "с",
-            "E": "Е", "e": "е",
-            "H": "Н",
-            "I": "І", "i": "і",
-            "K": "К",
-            "M": "М",
-            "O": "О", "o": "о",
-            "P": "Р", "p": "р",
-            "T": "Т",
-            "X": "Х", "x": "х",
-            "Y": "У", "y": "у",
-        }))
-
-        s = re.sub(r"[’ʼ'`´\-–—−‐]", "", s)
-        s = re.sub(r"[^\w\s]", " ", s, flags=re.UNICODE)
-        s = re.sub(r"\s+", " ", s).strip()
-
-        return s.casefold()
-
-    def _normalize_text_for_search(self, text: str) -> str:
-        return self._normalize_pib_flexible(text or "")
+        values = pd.Series(values, dtype=object)
+        codes, uniques = pd.factorize(values)
+        # object, а не string[pyarrow]: \w має лишатися юнікодним (як у re)
+        s = pd.Series(uniques, dtype=object)
+        s = s.str.normalize("NFKC").str.translate(_PIB_TRANS)
+        s = s.str.replace(_PIB_APOS_RE, "", regex=True)
+        s = s.str.replace(_PIB_NONWORD_RE, " ", regex=True)
+        s = s.str.replace(_PIB_WS_RE, " ", regex=True).str.strip()
+        # код -1 (None) потрапляє на доданий у кінець ""
+        normalized = np.append(s.str.casefold().to_numpy(dtype=object), "")[codes]
+        return pd.Series(normalized, index=values.index, dtype=object)
 
     # -------------------- ПОИСК --------------------
 
@@ -824,11 +1445,17 @@ class MatchAnalysisDialog(QDialog):
         if not self.pib_matches and not self.ors_matches:
             QMessageBox.information(self, "Готово", "Збігів не знайдено.")
 
+    def _fill_list(self, widget: QListWidget, labels: list[str]):
+        """Усі підписи одним addItems, без перемальовування списку по ходу."""
+        widget.setUpdatesEnabled(False)
+        widget.addItems(labels)
+        widget.setUpdatesEnabled(True)
+
     def _find_pib_matches(self):
         pib_series = self._get_pib_series()
 
         self.pib_matches = []
-        self.pib_unique_rows = None
+        self._pib_unique_idx = None
         self.list_matches_pib.clear()
         self.list_unique_pib.clear()
         self.btn_export_unique_pib.setEnabled(False)
@@ -839,60 +1466,61 @@ class MatchAnalysisDialog(QDialog):
 
         dob_col = next((c for c in self.left_df.columns if "Дата народ" in str(c) or "Дата рожд" in str(c)), None)
 
-        raw_lines = [ln.strip() for ln in self.right_text.splitlines() if ln.strip()]
-        norm_lines = [self._normalize_text_for_search(ln) for ln in raw_lines]
+        norm_lines = self._norm_lines
+        norm_doc = self._norm_doc
+        lines_by_date = self._lines_by_date
 
         matched_idx: set[int] = set()
-
-        for idx, raw_name in pib_series.items():
-            name = str(raw_name).split(",", 1)[0].strip()
-            if not name:
-                continue
-
-            norm_name = self._normalize_pib_flexible(name)
-            if not norm_name:
+        match_labels: list[str] = []
+        found_counts: dict[tuple[str, str], int] = {}
+
+        # ПІБ до первой запятой (дальше может идти дата) и их нормализация
+        names = [str(raw_name).split(",", 1)[0].strip() for raw_name in pib_series]
+        norm_names = self._normalize_series(names)
+
+        # дата рождения из своей колонки, а если там нет — из ячейки ПІБ;
+        # одним str.extract по колонке вместо df.at и regex на каждую строку
+        dobs = pib_series.str.extract(_DATE_RE, expand=False).fillna("")
+        if dob_col is not None:
+            dob_from_col = self.left_df[dob_col].astype(str).str.extract(_DATE_RE, expand=False).fillna("")
+            dobs = dob_from_col.where(dob_from_col != "", dobs)
+
+        for (idx, raw_name), name, norm_name, dob in zip(pib_series.items(), names, norm_names, dobs):
+            if not name or not norm_name:
                 continue
 
-            dob = ""
-            if dob_col and dob_col in self.left_df.columns:
-                dob = self._extract_dob_safe(self.left_df.at[idx, dob_col])
-
-            if not dob:
-                dob = self._extract_dob_safe(raw_name)
-
-            found_count = 0
-
-            if dob:
-                for norm_ln, raw_ln in zip(norm_lines, raw_lines):
-                    if norm_name in norm_ln and dob in raw_ln:
-                        found_count += 1
-            else:
-                for norm_ln in norm_lines:
-                    if norm_name in norm_ln:
-                        found_count += norm_ln.count(norm_name)
+            # одинаковые ПІБ (с той же датой) ищем в документе один раз
+            found_count = found_counts.get((norm_name, dob))
+            if found_count is None:
+                if dob:
+                    found_count = sum(norm_name in norm_lines[i] for i in lines_by_date.get(dob, ()))
+                else:
+                    found_count = norm_doc.count(norm_name)
+                found_counts[(norm_name, dob)] = found_count
 
             if found_count > 0:
                 self.pib_matches.append((idx, name))
                 if dob:
-                    self.list_matches_pib.addItem(f"{idx}: {name} | ДН: {dob} ({found_count})")
+                    match_labels.append(f"{idx}: {name} | ДН: {dob} ({found_count})")
                 else:
-                    self.list_matches_pib.addItem(f"{idx}: {name} ({found_count})")
+                    match_labels.append(f"{idx}: {name} ({found_count})")
                 matched_idx.add(idx)
 
-        self.pib_unique_rows = self.left_df[~self.left_df.index.isin(matched_idx)].copy()
+        self._pib_unique_idx = self.left_df.index[~self.left_df.index.isin(matched_idx)]
 
-        for idx, raw_name in pib_series.items():
-            if idx not in matched_idx:
-                self.list_unique_pib.addItem(f"{idx}: {raw_name}")
+        # строки без совпадений — по маске
+        unique = pib_series[~pib_series.index.isin(matched_idx)]
+        self._fill_list(self.list_matches_pib, match_labels)
+        self._fill_list(self.list_unique_pib, [f"{idx}: {raw_name}" for idx, raw_name in unique.items()])
 
-        self.btn_export_unique_pib.setEnabled(self.pib_unique_rows is not None and not self.pib_unique_rows.empty)
+        self.btn_export_unique_pib.setEnabled(len(self._pib_unique_idx) > 0)
         self.btn_export_matches_pib.setEnabled(len(self.pib_matches) > 0)
 
     def _find_ors_matches(self):
         ors_series = self._get_ors_series()
 
         self.ors_matches = []
-        self.ors_unique_rows = None
+        self._ors_unique_idx = None
         self.list_matches_ors.clear()
         self.list_unique_ors.clear()
         self.btn_export_unique_ors.setEnabled(False)
@@ -901,37 +1529,65 @@ class MatchAnalysisDialog(QDialog):
         if ors_series is None or self.left_df is None:
             return
 
-        text_lower = self.right_text.lower()
+        # Номер ОРС — одни цифры, так что каждое его вхождение лежит внутри
+        # одной цифровой серии текста. Текст проходим одним regex, а номера
+        # ищем только в уникальных сериях, вместо text.count по всему
+        # документу на каждую строку таблицы.
+        nums = {str(n).strip() for n in ors_series} - {""}
+        counts = _count_numbers_in_runs(_DIGITS_RE.findall(self.right_text), nums)
+
+        # Не найденные дословно номера ищем ещё среди цифр, разбитых
+        # пробелами ("123 456" после распознавания или вёрстки). Такие
+        # совпадения приблизительные и помечаются в списке знаком "≈".
+        missing = nums - counts.keys()
+        approx_counts = _count_spaced_numbers(self.right_text, missing) if missing else {}
+
         matched_idx: set[int] = set()
+        match_labels: list[str] = []
 
         for idx, raw_num in ors_series.items():
             num = str(raw_num).strip()
             if not num:
                 continue
 
-            num_lower = num.lower()
-            if num_lower in text_lower:
-                count = text_lower.count(num_lower)
+            count = counts.get(num, 0)
+            approx = approx_counts.get(num, 0)
+            if count or approx:
                 self.ors_matches.append((idx, num))
-                self.list_matches_ors.addItem(f"{idx}: {num} ({count})")
+                match_labels.append(f"{idx}: {num} ({count})" if count else f"{idx}: {num} (≈{approx})")
                 matched_idx.add(idx)
 
-        self.ors_unique_rows = self.left_df[~self.left_df.index.isin(matched_idx)].copy()
-        for idx, raw_num in ors_series.items():
-            if idx not in matched_idx:
-                self.list_unique_ors.addItem(f"{idx}: {raw_num}")
+        self._ors_unique_idx = self.left_df.index[~self.left_df.index.isin(matched_idx)]
+        unique = ors_series[~ors_series.index.isin(matched_idx)]
+        self._fill_list(self.list_matches_ors, match_labels)
+        self._fill_list(self.list_unique_ors, [f"{idx}: {raw_num}" for idx, raw_num in unique.items()])
 
-        self.btn_export_unique_ors.setEnabled(self.ors_unique_rows is not None and not self.ors_unique_rows.empty)
+        self.btn_export_unique_ors.setEnabled(len(self._ors_unique_idx) > 0)
         self.btn_export_matches_ors.setEnabled(len(self.ors_matches) > 0)
 
     # -------------------- ПОДСВЕТКА --------------------
 
+    def _merge_highlight(self, cursor: QTextCursor, fmt: QTextCharFormat):
+        """Підсвітити виділення курсора й запам'ятати діапазон для зняття."""
+        cursor.mergeCharFormat(fmt)
+        self._highlight_ranges.append((cursor.selectionStart(), cursor.selectionEnd()))
+
+    def _clear_highlights(self):
+        """
+        Зняти підсвітку лише з раніше підсвічених діапазонів, а не
+        переформатовувати весь документ.
+        """
+        cursor = QTextCursor(self.right_text_edit.document())
+        plain = QTextCharFormat()
+        for start, end in self._highlight_ranges:
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursor.setCharFormat(plain)
+        self._highlight_ranges.clear()
+
     def highlight_all_pib_matches(self):
         doc = self.right_text_edit.document()
-
-        cursor = QTextCursor(doc)
-        cursor.select(QTextCursor.Document)
-        cursor.setCharFormat(QTextCharFormat())
+        self._clear_highlights()
 
         if not self.pib_matches or not self.right_text:
             return
@@ -939,20 +1595,19 @@ class MatchAnalysisDialog(QDialog):
         fmt_yellow = QTextCharFormat()
         fmt_yellow.setBackground(Qt.yellow)
 
-        text_lower = self.right_text.lower()
-
-        for _, name in self.pib_matches:
-            name_lower = name.lower()
-            start = 0
-            while True:
-                pos = text_lower.find(name_lower, start)
-                if pos == -1:
-                    break
-                cursor = QTextCursor(doc)
-                cursor.setPosition(pos)
-                cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, len(name))
-                cursor.mergeCharFormat(fmt_yellow)
-                start = pos + len(name)
+        # Все ПІБ одним выражением-альтернативой (длинные первыми, чтобы их
+        # не перехватывали более короткие префиксы): один проход движка Qt
+        # по тексту вместо find по всему документу на каждое имя.
+        names = sorted({name for _, name in self.pib_matches}, key=len, reverse=True)
+        cursor = QTextCursor(doc)
+        for start in range(0, len(names), _PIB_HIGHLIGHT_BATCH):
+            pattern = "|".join(re.escape(n) for n in names[start:start + _PIB_HIGHLIGHT_BATCH])
+            it = QRegularExpression(pattern, QRegularExpression.CaseInsensitiveOption).globalMatch(self.right_text)
+            while it.hasNext():
+                m = it.next()
+                cursor.setPosition(m.capturedStart())
+                cursor.setPosition(m.capturedEnd(), QTextCursor.KeepAnchor)
+                self._merge_highlight(cursor, fmt_yellow)
 
     # -------------------- UI: выбор из списков --------------------
 
@@ -1014,40 +1669,32 @@ class MatchAnalysisDialog(QDialog):
             return
 
         name_lower = name.lower()
-        text_lower = self.right_text.lower()
-
-        positions = []
-        start = 0
-        while True:
-            pos = text_lower.find(name_lower, start)
-            if pos == -1:
-                break
-            positions.append(pos)
-            start = pos + len(name)
-
-        if not positions:
+
+        # все вхождения поиском самого QTextDocument (без флагов он не
+        # учитывает регистр), каждый следующий — с конца предыдущего
+        doc = self.right_text_edit.document()
+        found = []
+        cursor = doc.find(name, 0)
+        while not cursor.isNull():
+            found.append(cursor)
+            cursor = doc.find(name, cursor)
+
+        if not found:
             QMessageBox.information(self, "Немає вхождень", f"У документі не знайдено:\n{name}")
             return
 
         key = (mode, name_lower)
         cur_idx = self._unique_pos_index.get(key, -1) + 1
-        if cur_idx >= len(positions):
+        if cur_idx >= len(found):
             cur_idx = 0
         self._unique_pos_index[key] = cur_idx
-        pos = positions[cur_idx]
+        cursor = found[cur_idx]
 
-        doc = self.right_text_edit.document()
-        cursor = QTextCursor(doc)
-        cursor.select(QTextCursor.Document)
-        cursor.setCharFormat(QTextCharFormat())
+        self._clear_highlights()
 
         fmt = QTextCharFormat()
         fmt.setBackground(QColor("#d9b3ff"))
-
-        cursor = self.right_text_edit.textCursor()
-        cursor.setPosition(pos)
-        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, len(name))
-        cursor.mergeCharFormat(fmt)
+        self._merge_highlight(cursor, fmt)
 
         self.right_text_edit.setTextCursor(cursor)
         self.right_text_edit.ensureCursorVisible()
@@ -1056,37 +1703,34 @@ class MatchAnalysisDialog(QDialog):
         if not self.right_text:
             return
 
-        text_lower = self.right_text.lower()
-        name_lower = name.lower()
-        pos = text_lower.find(name_lower)
-        if pos == -1:
+        cursor = self.right_text_edit.document().find(name, 0)
+        if cursor.isNull():
             return
 
         self.highlight_all_pib_matches()
 
-        cursor = self.right_text_edit.textCursor()
-        cursor.setPosition(pos)
-        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, len(name))
-
         fmt_sel = QTextCharFormat()
         fmt_sel.setBackground(Qt.lightGray)
-        cursor.mergeCharFormat(fmt_sel)
+        self._merge_highlight(cursor, fmt_sel)
 
         self.right_text_edit.setTextCursor(cursor)
         self.right_text_edit.ensureCursorVisible()
 
     def highlight_in_right_table(self, name: str):
         model = self.right_table.model()
-        if model is None:
+        if model is None or self.right_df is None:
             return
         name_lower = name.lower()
-        for r in range(model.rowCount()):
-            for c in range(model.columnCount()):
-                val = str(model.index(r, c).data())
-                if name_lower in val.lower():
-                    self.right_table.selectRow(r)
-                    self.right_table.scrollTo(model.index(r, 0))
-                    return
+        # первая строка, где имя есть хотя бы в одной клетке: по колонке за
+        # вызов str.contains, а не data() и lower() на каждую клетку
+        hits = np.zeros(len(self.right_df), dtype=bool)
+        for col in self._right_cols_lower:
+            hits |= col.str.contains(name_lower, regex=False).to_numpy(dtype=bool, na_value=False)
+        rows = np.flatnonzero(hits)
+        if rows.size:
+            r = int(rows[0])
+            self.right_table.selectRow(r)
+            self.right_table.scrollTo(model.index(r, 0))
 
     # -------------------- экспорт --------------------
 
@@ -1115,41 +1759,16 @@ class MatchAnalysisDialog(QDialog):
 
         try:
             df_out = self._format_df_for_export(df)
-
-            if path.lower().endswith(".docx") or "Word" in selected_filter:
-                doc = Document()
-                section = doc.sections[0]
-                section.orientation = WD_ORIENT.LANDSCAPE
-                new_width, new_height = section.page_height, section.page_width
-                section.page_width = new_width
-                section.page_height = new_height
-
-                table = doc.add_table(rows=1, cols=len(df_out.columns))
-                table.style = "Table Grid"
-
-                hdr_cells = table.rows[0].cells
-                for j, col_name in enumerate(df_out.columns):
-                    hdr_cells[j].text = str(col_name)
-
-                for _, row in df_out.iterrows():
-                    row_cells = table.add_row().cells
-                    for j, col_name in enumerate(df_out.columns):
-                        value = row[col_name]
-                        row_cells[j].text = "" if pd.isna(value) else str(value)
-
-                doc.save(path)
-
-            elif path.lower().endswith(".xlsx") or "Excel" in selected_filter:
-                df_out.to_excel(path, index=False)
-            else:
-                df_out.to_csv(path, index=False)
-
+            save_df_to_file(df_out, path, selected_filter)
             QMessageBox.information(self, "OK", f"Файл збережено:\n{path}")
         except Exception as e:
             QMessageBox.critical(self, "Помилка", str(e))
 
     def export_unique_rows(self, mode: str):
-        unique_rows = self.pib_unique_rows if mode == "pib" else self.ors_unique_rows
+        unique_idx = self._pib_unique_idx if mode == "pib" else self._ors_unique_idx
+        unique_rows = None
+        if unique_idx is not None and self.left_df is not None:
+            unique_rows = self.left_df[self.left_df.index.isin(unique_idx)]
         self._export_df(unique_rows, "Зберегти унікальні рядки")
 
     def export_matches_rows(self, mode: str):
@@ -1169,7 +1788,7 @@ class MatchAnalysisDialog(QDialog):
                 seen.add(i)
                 ordered.append(i)
 
-        df_matches = self.left_df.loc[ordered].copy()
+        df_matches = self.left_df.loc[ordered]
         self._export_df(df_matches, "Зберегти збіги")
 
 
@@ -1189,6 +1808,16 @@ class MainWindow(QMainWindow):
 
         self.conditions: list[FilterCondition] = []
         self.global_search_text: str = ""
+        # производные данные колонок df_original: строки и даты для фильтров
+        # и поиска, списки уникальных значений; ключ — (вид, колонка)
+        self._column_cache: dict = {}
+        # маски по набору условий (tuple(self.conditions)) — поиск и вкладки
+        # меняют только свою часть, условия заново не считаются
+        self._cond_mask_cache: dict = {}
+
+        # фоновая запись экспорта (см. export_file)
+        self._export_thread: QThread | None = None
+        self._export_worker: ExportWorker | None = None
 
         self.expired_indices: Set[Any] = set()
         self.expiring_by5_indices: Set[Any] = set()
@@ -1199,6 +1828,23 @@ class MainWindow(QMainWindow):
         self.ors_warning_rows: Set[Any] = set()
         self.ors_overdue_rows: Set[Any] = set()
 
+        # те же множества как bool-маски по строкам df_original: вкладки и
+        # подсветка модели берут их срезом, без поиска меток в множествах
+        self._expired_mask = np.zeros(0, dtype=bool)
+        self._expiring_mask = np.zeros(0, dtype=bool)
+        self._ors_warning_mask = np.zeros(0, dtype=bool)
+        self._ors_overdue_mask = np.zeros(0, dtype=bool)
+        self._duplicate_mask = np.zeros(0, dtype=bool)
+        # позиции строк df_current в df_original (None — все строки)
+        self._current_rows: np.ndarray | None = None
+
+        # ПІБ неудалённых строк для точечного пересчёта дубликатов при правке;
+        # словари метка → имя и имя → метки строятся при первой правке ПІБ
+        self._pib_col: str | None = None
+        self._pib_names = pd.Series(dtype=object)
+        self._pib_name_of: dict | None = None
+        self._pib_groups: dict | None = None
+
         self.col5_name: str | None = None
         self.col7_name: str | None = None
         self.col8_name: str | None = None
@@ -1246,6 +1892,12 @@ class MainWindow(QMainWindow):
         self.ed_search.setEnabled(False)
         top.addWidget(self.ed_search, stretch=2)
 
+        # фильтруем не на каждую букву, а когда пауза в наборе
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self.apply_all_filters)
+
         self.tab_mode = QTabWidget()
         self.tab_mode.addTab(QWidget(), "Основні")
         self.tab_mode.addTab(QWidget(), "Архів")
@@ -1270,7 +1922,10 @@ class MainWindow(QMainWindow):
 
         self.cb_prosecutor = QComboBox()
         self.cb_prosecutor.addItem("Усі прокуратури")
-        self.cb_prosecutor.currentIndexChanged.connect(self.apply_all_filters)
+        # прокрутка колесом перебирает прокуратуры подряд — фильтруем по
+        # той же паузе, что и глобальный поиск
+        # индекс из сигнала в start() не передаём — он стал бы интервалом таймера
+        self.cb_prosecutor.currentIndexChanged.connect(lambda _index: self._search_timer.start())
         self.cb_prosecutor.setEnabled(False)
         left.addWidget(self.cb_prosecutor)
 
@@ -1376,6 +2031,9 @@ class MainWindow(QMainWindow):
         self.table_view.horizontalHeader().setStretchLastSection(True)
         self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        # одинаковая высота строк: при прокрутке Qt не спрашивает размер каждой строки
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
 
         main_splitter.addWidget(left_widget)
         main_splitter.addWidget(self.table_view)
@@ -1432,14 +2090,27 @@ class MainWindow(QMainWindow):
 
     # -------------------- helpers --------------------
 
-    def _is_date_like_column(self, series: pd.Series) -> bool:
+    def _is_date_like_column(self, column: str) -> bool:
+        key = ("date_like", column)
+        if key not in self._column_cache:
+            self._column_cache[key] = self._detect_date_like(self.df_original[column])
+        return self._column_cache[key]
+
+    @staticmethod
+    def _detect_date_like(series: pd.Series) -> bool:
         if pd.api.types.is_datetime64_any_dtype(series):
             return True
         try:
-            return series.astype(str).str.contains(r"\d{2}\.\d{2}\.\d{4}").any()
+            return bool(_as_str(series).str.contains(r"\d{2}\.\d{2}\.\d{4}").any())
         except Exception:
             return False
 
+    def _column_dates(self, column: str) -> pd.Series:
+        """Первая дата дд.мм.рррр из каждой ячейки колонки (разбор кэшируется)."""
+        df = self.df_original
+        dates = _column_values(df, column, None, self._column_cache, "dates", _parsed_dates)
+        return pd.Series(dates, index=df.index)
+
     def _save_last_file(self, path: str):
         try:
             CONFIG_PATH.write_text(json.dumps({"last_file": path}, ensure_ascii=False), encoding="utf-8")
@@ -1476,41 +2147,32 @@ class MainWindow(QMainWindow):
 
     def _setup_dataframe(self, df: pd.DataFrame, show_message: bool):
         self.df_original = df
-        self.df_current = df.copy()
+        self._invalidate_column_cache()
+        # видимые строки посчитает apply_all_filters в конце, один раз
+        self.df_current = df
+        self._current_rows = None
 
         self.recalc_expiring_and_expired(show_popup=show_message)
         self.recalc_duplicate_marks(show_popup=show_message)
 
-        model = PandasTableModel(
-            self.df_current,
-            edit_callback=self.on_cell_edited,
-            expiring_by5_indices=self.expiring_by5_indices,
-            expired_indices=self.expired_indices,
-            duplicate_indices=self.duplicate_indices,
-            ors_warning_indices=self.ors_warning_indices,
-            ors_overdue_indices=self.ors_overdue_indices,
-            col5_name=self.col5_name,
-            col7_name=self.col7_name,
-            col8_name=self.col8_name,
-        )
+        model = PandasTableModel(self.df_current, edit_callback=self.on_cell_edited, **self._highlight_args())
         self.table_view.setModel(model)
         self.hide_service_columns()
 
         self.cb_prosecutor.setEnabled(True)
         self.cb_prosecutor.blockSignals(True)
         self.cb_prosecutor.clear()
-        self.cb_prosecutor.addItem("Усі прокуратури")
-        if "Прокуратура" in df.columns:
-            for p in sorted(df["Прокуратура"].dropna().unique()):
-                self.cb_prosecutor.addItem(str(p))
+        prosecutors = self._unique_values("Прокуратура") if "Прокуратура" in df.columns else []
+        self.cb_prosecutor.addItems(["Усі прокуратури", *prosecutors])
         self.cb_prosecutor.setCurrentIndex(0)
         self.cb_prosecutor.blockSignals(False)
 
+        # on_column_changed вызывается ниже один раз, после заполнения списка
         self.cb_column.setEnabled(True)
+        self.cb_column.blockSignals(True)
         self.cb_column.clear()
-        for col in df.columns:
-            if col not in SERVICE_COLS:
-                self.cb_column.addItem(col)
+        self.cb_column.addItems([str(col) for col in df.columns if col not in SERVICE_COLS])
+        self.cb_column.blockSignals(False)
 
         self.cb_operator.setEnabled(True)
         self.ed_value.setEnabled(True)
@@ -1519,22 +2181,30 @@ class MainWindow(QMainWindow):
         self.btn_remove_condition.setEnabled(True)
 
         self.btn_add.setEnabled(True)
-        self.btn_export.setEnabled(True)
+        # во время фонового экспорта кнопка остаётся погашенной
+        self.btn_export.setEnabled(self._export_thread is None)
         self.btn_match.setEnabled(True)
         self.ed_search.setEnabled(True)
         self.btn_check_duplicates.setEnabled(True)
 
+        # сбрасываем поиск и вкладку без сигналов: иначе каждый из них
+        # запустил бы фильтрацию ещё до конца настройки
         self.conditions.clear()
         self.list_conditions.clear()
         self.global_search_text = ""
+        self.ed_search.blockSignals(True)
         self.ed_search.clear()
+        self.ed_search.blockSignals(False)
 
         self.view_mode = "main"
+        self.tab_mode.blockSignals(True)
         self.tab_mode.setCurrentIndex(0)
+        self.tab_mode.blockSignals(False)
         self.update_action_buttons_state()
 
         self.on_column_changed(self.cb_column.currentIndex())
 
+        self.apply_all_filters()
         self._save_state()
 
     # -------------------- загрузка --------------------
@@ -1591,8 +2261,6 @@ class MainWindow(QMainWindow):
             return
 
         df = self.df_original
-        today = pd.Timestamp.today().normalize()
-        cutoff_5 = pd.Timestamp(2025, 9, 1)
 
         self.col5_name = next((c for c in df.columns if "Запобіжний захід" in str(c)), None)
         self.col7_name = next(
@@ -1601,46 +2269,26 @@ class MainWindow(QMainWindow):
         )
         self.col8_name = next((c for c in df.columns if "№ ОРС" in str(c)), None)
 
-        if self.col5_name:
-            ser5 = df[self.col5_name].astype(str)
-            first_dates_str = ser5.str.extract(r"(\d{2}\.\d{2}\.\d{4})")[0]
-            dates5 = pd.to_datetime(first_dates_str, format="%d.%m.%Y", errors="coerce")
-            expiry_dates = dates5 + pd.DateOffset(months=6)
-
-            for idx in df.index:
-                d_exp = expiry_dates.loc[idx]
-                if pd.isna(d_exp):
-                    continue
-                if d_exp < cutoff_5:
-                    continue
-                days_left = (d_exp - today).days
-                if days_left < 0:
-                    self.expired_indices.add(idx)
-                elif 0 <= days_left <= 10:
-                    self.expiring_by5_indices.add(idx)
-
+        dates5 = self._column_dates(self.col5_name) if self.col5_name else None
+        d7 = d8 = None
         if self.col7_name and self.col8_name:
-            ser7 = df[self.col7_name].astype(str)
-            ser8 = df[self.col8_name].astype(str)
-
-            d7 = pd.to_datetime(ser7.str.extract(r"(\d{2}\.\d{2}\.\d{4})")[0], format="%d.%m.%Y", errors="coerce")
-            d8 = pd.to_datetime(ser8.str.extract(r"(\d{2}\.\d{2}\.\d{4})")[0], format="%d.%m.%Y", errors="coerce")
-
-            for idx in df.index:
-                base_date = d7.loc[idx]
-                ors_date = d8.loc[idx]
-                if pd.isna(base_date):
-                    continue
-                if not pd.isna(ors_date):
-                    continue
+            d7 = self._column_dates(self.col7_name)
+            d8 = self._column_dates(self.col8_name)
 
-                days_passed = (today - base_date).days
-                if 0 <= days_passed <= 20:
-                    self.ors_warning_indices.add(idx)
-                    self.ors_warning_rows.add(idx)
-                elif days_passed > 20:
-                    self.ors_overdue_indices.add(idx)
-                    self.ors_overdue_rows.add(idx)
+        expired, expiring, warning, overdue = _expiry_masks(
+            len(df), dates5, d7, d8, pd.Timestamp.today().normalize()
+        )
+        self._expired_mask = expired
+        self._expiring_mask = expiring
+        self._ors_warning_mask = warning
+        self._ors_overdue_mask = overdue
+        # метки строк берутся один раз по готовым маскам
+        self.expired_indices = set(df.index[expired])
+        self.expiring_by5_indices = set(df.index[expiring])
+        self.ors_warning_indices = set(df.index[warning])
+        self.ors_warning_rows = set(self.ors_warning_indices)
+        self.ors_overdue_indices = set(df.index[overdue])
+        self.ors_overdue_rows = set(self.ors_overdue_indices)
 
         if show_popup:
             parts = []
@@ -1655,18 +2303,58 @@ class MainWindow(QMainWindow):
             if parts:
                 QMessageBox.warning(self, "Увага", "\n".join(parts))
 
+    def _update_row_expiry(self, label):
+        """Пересчитать сроки одной отредактированной строки вместо всей таблицы."""
+        df = self.df_original
+        pos = df.index.get_loc(label)
+        # метка из модели может прийти numpy-скаляром — берём её из индекса,
+        # как при полном пересчёте
+        label = df.index[pos]
+        row = df.loc[[label]]
+
+        def row_dates(column):
+            return _to_datetime_series(row[column]) if column else None
+
+        d7 = d8 = None
+        if self.col7_name and self.col8_name:
+            d7, d8 = row_dates(self.col7_name), row_dates(self.col8_name)
+        flags = _expiry_masks(1, row_dates(self.col5_name), d7, d8, pd.Timestamp.today().normalize())
+
+        targets = (
+            (self._expired_mask, (self.expired_indices,)),
+            (self._expiring_mask, (self.expiring_by5_indices,)),
+            (self._ors_warning_mask, (self.ors_warning_indices, self.ors_warning_rows)),
+            (self._ors_overdue_mask, (self.ors_overdue_indices, self.ors_overdue_rows)),
+        )
+        for flag, (mask, sets) in zip(flags, targets):
+            hit = bool(flag[0])
+            mask[pos] = hit
+            for labels in sets:
+                if hit:
+                    labels.add(label)
+                else:
+                    labels.discard(label)
+
     # -------------------- дубликаты --------------------
 
     def recalc_duplicate_marks(self, show_popup: bool = True):
         old_count = len(self.duplicate_indices)
         self.duplicate_indices = set()
+        self._pib_col = None
+        self._pib_names = pd.Series(dtype=object)
+        self._pib_name_of = self._pib_groups = None
 
         if self.df_original is None:
             return
 
         df = self.df_original
+        self._duplicate_mask = np.zeros(len(df), dtype=bool)
+        # позиции учитываемых строк в df_original — для маски дубликатов
+        positions = np.arange(len(df))
         if "is_deleted" in df.columns:
-            df = df[df["is_deleted"] == False]
+            kept = (df["is_deleted"] == False).to_numpy(dtype=bool, na_value=False)
+            df = df[kept]
+            positions = positions[kept]
 
         if df.empty:
             return
@@ -1679,26 +2367,70 @@ class MainWindow(QMainWindow):
         name_series = full_series.str.split(",", n=1).str[0].str.strip()
         valid = name_series != ""
         name_valid = name_series[valid]
+        self._pib_col = pib_col
+        self._pib_names = name_valid
         if name_valid.empty:
             return
 
+        # число повторов каждого имени прямо на строки: один проход по
+        # хэш-таблице value_counts, без промежуточного множества имён
         counts = name_valid.value_counts()
-        dup_names = set(counts[counts > 1].index)
-        if not dup_names:
+        mask_dups = name_series.map(counts).gt(1).to_numpy(dtype=bool, na_value=False)
+        if not mask_dups.any():
             return
 
-        mask_dups = name_series.isin(dup_names)
+        self._duplicate_mask[positions[mask_dups]] = True
         idxs = df.index[mask_dups].tolist()
         self.duplicate_indices.update(idxs)
 
         if show_popup and len(self.duplicate_indices) > old_count:
             QMessageBox.warning(self, "Дублікати", f"Виявлено {len(self.duplicate_indices)} запис(ів)-дублікат(ів) (за ПІБ).")
 
+    def _update_row_duplicate(self, label):
+        """Поправить отметки дубликатов после правки ПІБ в одной строке."""
+        df = self.df_original
+        label = df.index[df.index.get_loc(label)]
+        if "is_deleted" in df.columns and df.at[label, "is_deleted"] != False:
+            return
+
+        if self._pib_groups is None:
+            self._pib_name_of = dict(self._pib_names.items())
+            self._pib_groups = {}
+            for row_label, name in self._pib_name_of.items():
+                self._pib_groups.setdefault(name, set()).add(row_label)
+        groups = self._pib_groups
+
+        def mark(labels, hit: bool):
+            self._duplicate_mask[df.index.get_indexer(list(labels))] = hit
+            if hit:
+                self.duplicate_indices.update(labels)
+            else:
+                self.duplicate_indices.difference_update(labels)
+
+        old = self._pib_name_of.pop(label, None)
+        if old is not None:
+            group = groups[old]
+            group.discard(label)
+            mark([label], False)
+            if len(group) == 1:
+                # у старого имени остался один владелец — он больше не дубликат
+                mark(group, False)
+            elif not group:
+                del groups[old]
+
+        new = str(df.at[label, self._pib_col]).split(",", 1)[0].strip()
+        if new:
+            self._pib_name_of[label] = new
+            group = groups.setdefault(new, set())
+            group.add(label)
+            if len(group) > 1:
+                mark(group, True)
+
     # -------------------- поиск/фильтры --------------------
 
     def on_global_search(self, text: str):
         self.global_search_text = text.strip()
-        self.apply_all_filters()
+        self._search_timer.start()
 
     def on_column_changed(self, index: int):
         if self.df_original is None or index < 0:
@@ -1708,8 +2440,7 @@ class MainWindow(QMainWindow):
         if not column:
             return
 
-        series = self.df_original[column]
-        is_date_like = self._is_date_like_column(series)
+        is_date_like = self._is_date_like_column(column)
 
         self.cb_operator.setVisible(True)
         self.ed_value.setVisible(True)
@@ -1726,16 +2457,30 @@ class MainWindow(QMainWindow):
         self.ed_date_from.clear()
         self.ed_date_to.clear()
 
-        uniques = series.dropna().unique()
+        uniques = self._unique_values(column)
         if len(uniques) <= 50 or column in ("Стаття_ККУ", "Категорія_розшуку"):
             self.cb_value_choices.setVisible(True)
+            self.cb_value_choices.blockSignals(True)
             self.cb_value_choices.clear()
-            self.cb_value_choices.addItem("— оберіть значення —")
-            for val in sorted(map(str, uniques)):
-                self.cb_value_choices.addItem(val)
+            self.cb_value_choices.addItems(["— оберіть значення —", *uniques])
+            self.cb_value_choices.blockSignals(False)
         else:
             self.cb_value_choices.setVisible(False)
 
+    def _unique_values(self, column: str) -> list[str]:
+        """Отсортированные уникальные значения колонки (кэш до правки колонки)."""
+        key = ("uniques", column)
+        uniques = self._column_cache.get(key)
+        if uniques is None:
+            values = self.df_original[column].dropna().unique()
+            if isinstance(values.dtype, pd.StringDtype):
+                # строки уже str — сортирует сам pandas (arrow-строки в C)
+                uniques = pd.Series(values).sort_values().tolist()
+            else:
+                uniques = sorted(map(str, values))
+            self._column_cache[key] = uniques
+        return uniques
+
     def on_value_choice_selected(self, index: int):
         if index <= 0:
             return
@@ -1749,8 +2494,7 @@ class MainWindow(QMainWindow):
         if not column:
             return
 
-        series = self.df_original[column]
-        is_date_like = self._is_date_like_column(series)
+        is_date_like = self._is_date_like_column(column)
 
         if is_date_like:
             from_text = self.ed_date_from.text().strip()
@@ -1854,53 +2598,76 @@ class MainWindow(QMainWindow):
             self.btn_delete_rows.setEnabled(True)
             self.btn_restore_rows.setEnabled(True)
 
+    def _highlight_args(self) -> dict:
+        """Аргументы подсветки для модели: маски, срезанные по строкам df_current."""
+        rows = self._current_rows
+        masks = {
+            "expiring_by5_indices": self._expiring_mask,
+            "expired_indices": self._expired_mask,
+            "duplicate_indices": self._duplicate_mask,
+            "ors_warning_indices": self._ors_warning_mask,
+            "ors_overdue_indices": self._ors_overdue_mask,
+        }
+        if rows is not None:
+            masks = {key: mask[rows] for key, mask in masks.items()}
+        return dict(masks, col5_name=self.col5_name, col7_name=self.col7_name, col8_name=self.col8_name)
+
+    def _view_mode_mask(self, df: pd.DataFrame) -> np.ndarray | None:
+        """Маска строк для текущей вкладки (None — показывать всё)."""
+        if "is_deleted" not in df.columns:
+            return None
+
+        not_deleted = (df["is_deleted"] == False).to_numpy(dtype=bool)
+        if self.view_mode == "main":
+            return not_deleted
+        if self.view_mode == "archive":
+            return not_deleted & (df["is_archived"] == True).to_numpy(dtype=bool)
+        if self.view_mode == "deleted":
+            return (df["is_deleted"] == True).to_numpy(dtype=bool)
+        # маски вкладок готовит recalc_expiring_and_expired, он же вызывается
+        # при каждом изменении числа строк — длины совпадают с df_original
+        if self.view_mode == "expired":
+            return not_deleted & self._expired_mask
+        if self.view_mode == "ors_warning":
+            return not_deleted & self._ors_warning_mask
+        if self.view_mode == "ors_overdue":
+            return not_deleted & self._ors_overdue_mask
+        return None
+
     def apply_all_filters(self):
+        # текущий текст поиска учитывается здесь — отложенный запуск не нужен
+        self._search_timer.stop()
         if self.df_original is None:
             return
 
-        df = self.df_original.copy()
-
+        # все фильтры собираем в одну маску по df_original и режем таблицу
+        # один раз — без копии всей таблицы на каждый вызов
+        base = self.df_original
         if self.conditions:
-            df = apply_filters(df, self.conditions)
+            # маска из кэша общая — дальше её меняем на месте, поэтому копия
+            mask = self._conditions_mask(base).copy()
+        else:
+            mask = np.ones(len(base), dtype=bool)
 
         pros = self.cb_prosecutor.currentText()
-        if pros and pros != "Усі прокуратури" and "Прокуратура" in df.columns:
-            df = df[df["Прокуратура"] == pros]
+        if pros and pros != "Усі прокуратури" and "Прокуратура" in base.columns:
+            mask &= (base["Прокуратура"] == pros).to_numpy(dtype=bool)
 
-        if self.global_search_text:
-            text = self.global_search_text
-            mask = df.apply(lambda col: col.astype(str).str.contains(text, case=False, na=False), axis=0).any(axis=1)
-            df = df[mask]
+        view_mask = self._view_mode_mask(base)
+        if view_mask is not None:
+            mask &= view_mask
 
-        if "is_deleted" in df.columns:
-            if self.view_mode == "main":
-                df = df[df["is_deleted"] == False]
-            elif self.view_mode == "archive":
-                df = df[(df["is_deleted"] == False) & (df["is_archived"] == True)]
-            elif self.view_mode == "deleted":
-                df = df[df["is_deleted"] == True]
-            elif self.view_mode == "expired":
-                df = df[(df["is_deleted"] == False) & (df.index.isin(self.expired_indices))]
-            elif self.view_mode == "ors_warning":
-                df = df[(df["is_deleted"] == False) & (df.index.isin(self.ors_warning_rows))]
-            elif self.view_mode == "ors_overdue":
-                df = df[(df["is_deleted"] == False) & (df.index.isin(self.ors_overdue_rows))]
+        if self.global_search_text:
+            rows = np.flatnonzero(mask)
+            mask[rows] = search_hits(base, rows, self.global_search_text, self._column_cache)
 
+        df = base[mask]
         self.df_current = df
+        self._current_rows = np.flatnonzero(mask)
 
         model = self.table_view.model()
         if isinstance(model, PandasTableModel):
-            model.update_df(
-                self.df_current,
-                expiring_by5_indices=self.expiring_by5_indices,
-                expired_indices=self.expired_indices,
-                duplicate_indices=self.duplicate_indices,
-                ors_warning_indices=self.ors_warning_indices,
-                ors_overdue_indices=self.ors_overdue_indices,
-                col5_name=self.col5_name,
-                col7_name=self.col7_name,
-                col8_name=self.col8_name,
-            )
+            model.update_df(self.df_current, **self._highlight_args())
         else:
             self.table_view.setModel(PandasTableModel(self.df_current, edit_callback=self.on_cell_edited))
 
@@ -1908,19 +2675,73 @@ class MainWindow(QMainWindow):
 
     # -------------------- синхронизация правок --------------------
 
+    def _conditions_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Маска self.conditions по df; один и тот же набор условий считается один раз."""
+        key = tuple(self.conditions)
+        mask = self._cond_mask_cache.pop(key, None)
+        if mask is None:
+            mask = filter_mask(df, self.conditions, self._column_cache)
+            if len(self._cond_mask_cache) >= COND_MASK_CACHE_SIZE:
+                # первым в словаре лежит набор, к которому дольше всех не обращались
+                del self._cond_mask_cache[next(iter(self._cond_mask_cache))]
+        # (пере)вставка ставит набор в конец — порядок словаря = порядок обращений
+        self._cond_mask_cache[key] = mask
+        return mask
+
+    def _invalidate_column_cache(self, column: str | None = None):
+        """Сбросить кэш колонок: одной (после правки) или весь (новые строки)."""
+        if column is None:
+            self._column_cache.clear()
+            self._cond_mask_cache.clear()
+            return
+        for key in [k for k in self._column_cache if k[1] == column]:
+            del self._column_cache[key]
+        for key in [k for k in self._cond_mask_cache if any(c.column == column for c in k)]:
+            del self._cond_mask_cache[key]
+
     def on_cell_edited(self, orig_index, column_name: str, new_value):
         if self.df_original is None:
             return
         if orig_index in self.df_original.index and column_name in self.df_original.columns:
             self.df_original.at[orig_index, column_name] = new_value
+            self._invalidate_column_cache(column_name)
 
-        if column_name not in ("is_archived", "is_deleted"):
-            self.recalc_expiring_and_expired(show_popup=False)
-            self.recalc_duplicate_marks(show_popup=False)
+            # правка меняет одну ячейку — пересчитываем только её строку
+            # и только то, что зависит от этой колонки
+            if column_name in (self.col5_name, self.col7_name, self.col8_name):
+                self._update_row_expiry(orig_index)
+            if column_name == self._pib_col:
+                self._update_row_duplicate(orig_index)
 
         self._save_state()
         self.apply_all_filters()
 
+    def _append_to_column_cache(self, label):
+        """
+        Дописать в кэш колонок значения новой строки label (она последняя
+        в df_original) вместо того, чтобы пересчитывать колонки целиком.
+        """
+        df = self.df_original
+        new_row = df.loc[[label]]
+        # маски условий короче таблицы на строку — их проще посчитать заново
+        self._cond_mask_cache.clear()
+        builders = {"lower": _lowered, "strip": _stripped, "dates": _parsed_dates}
+        for key in list(self._column_cache):
+            kind, column = key
+            cached = self._column_cache[key]
+            if column not in df.columns:
+                del self._column_cache[key]
+            elif kind in builders:
+                self._column_cache[key] = np.concatenate([cached, builders[kind](new_row[column])])
+            elif kind == "uniques":
+                value = new_row[column].iloc[0]
+                if not pd.isna(value) and str(value) not in cached:
+                    self._column_cache[key] = sorted([*cached, str(value)])
+            elif kind == "date_like":
+                self._column_cache[key] = cached or self._detect_date_like(new_row[column])
+            else:
+                del self._column_cache[key]
+
     # -------------------- выделение --------------------
 
     def get_selected_indices(self) -> list[int]:
@@ -1944,7 +2765,7 @@ class MainWindow(QMainWindow):
             return
 
         if "Прокуратура" in self.df_original.columns:
-            prosecutors = sorted(self.df_original["Прокуратура"].dropna().unique())
+            prosecutors = self._unique_values("Прокуратура")
         else:
             prosecutors = []
 
@@ -2007,6 +2828,9 @@ class MainWindow(QMainWindow):
 
         new_row_df = pd.DataFrame([row], columns=self.df_original.columns)
         self.df_original = pd.concat([self.df_original, new_row_df], ignore_index=True)
+        # строка встала последней, порядок прежних не изменился — кэш колонок
+        # дописываем одной строкой, а не пересчитываем колонки целиком
+        self._append_to_column_cache(self.df_original.index[-1])
 
         self.recalc_expiring_and_expired(show_popup=False)
         self.recalc_duplicate_marks(show_popup=True)
@@ -2021,6 +2845,7 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Архів", "Не вибрано жодного рядка.")
             return
         self.df_original.loc[idxs, "is_archived"] = True
+        self._invalidate_column_cache("is_archived")
         self._save_state()
         self.recalc_duplicate_marks(show_popup=False)
         self.apply_all_filters()
@@ -2031,6 +2856,7 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Архів", "Не вибрано жодного рядка.")
             return
         self.df_original.loc[idxs, "is_archived"] = False
+        self._invalidate_column_cache("is_archived")
         self._save_state()
         self.recalc_duplicate_marks(show_popup=False)
         self.apply_all_filters()
@@ -2041,6 +2867,7 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Видалення", "Не вибрано жодного рядка.")
             return
         self.df_original.loc[idxs, "is_deleted"] = True
+        self._invalidate_column_cache("is_deleted")
         self._save_state()
         self.recalc_duplicate_marks(show_popup=False)
         self.apply_all_filters()
@@ -2051,10 +2878,18 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Відновлення", "Не вибрано жодного рядка.")
             return
         self.df_original.loc[idxs, "is_deleted"] = False
+        self._invalidate_column_cache("is_deleted")
         self._save_state()
         self.recalc_duplicate_marks(show_popup=False)
         self.apply_all_filters()
 
+    def _refresh_highlights(self):
+        """Передать модели текущие маски подсветки, не меняя строк."""
+        model = self.table_view.model()
+        if not isinstance(model, PandasTableModel):
+            return
+        model.update_highlights(**self._highlight_args())
+
     # -------------------- дублікати кнопкой --------------------
 
     def on_check_duplicates_clicked(self):
@@ -2062,7 +2897,9 @@ class MainWindow(QMainWindow):
         self.recalc_duplicate_marks(show_popup=False)
         new_count = len(self.duplicate_indices)
 
-        self.apply_all_filters()
+        # набор строк не меняется (дубликаты ни на что не фильтруют) —
+        # перекрашиваем фон без повторной фильтрации
+        self._refresh_highlights()
 
         if new_count == 0:
             QMessageBox.information(self, "Дублікати", "Дублікати за ПІБ не виявлено.")
@@ -2087,6 +2924,8 @@ class MainWindow(QMainWindow):
         return out
 
     def export_file(self):
+        if self._export_thread is not None:
+            return
         if self.df_current is None or self.df_current.empty:
             QMessageBox.warning(self, "Експорт", "Немає даних для експорту.")
             return
@@ -2100,38 +2939,48 @@ class MainWindow(QMainWindow):
 
         try:
             df_out = self._format_df_for_export(self.df_current)
+        except Exception as e:
+            QMessageBox.critical(self, "Помилка експорту", str(e))
+            return
 
-            if path.lower().endswith(".docx") or "Word" in selected_filter:
-                doc = Document()
-                section = doc.sections[0]
-                section.orientation = WD_ORIENT.LANDSCAPE
-                new_width, new_height = section.page_height, section.page_width
-                section.page_width = new_width
-                section.page_height = new_height
-
-                table = doc.add_table(rows=1, cols=len(df_out.columns))
-                table.style = "Table Grid"
-
-                hdr_cells = table.rows[0].cells
-                for j, col_name in enumerate(df_out.columns):
-                    hdr_cells[j].text = str(col_name)
-
-                for _, row in df_out.iterrows():
-                    row_cells = table.add_row().cells
-                    for j, col_name in enumerate(df_out.columns):
-                        value = row[col_name]
-                        row_cells[j].text = "" if pd.isna(value) else str(value)
+        # запись файла — в фоновом потоке, кнопку гасим до её окончания
+        thread = QThread(self)
+        worker = ExportWorker(df_out, path, selected_filter)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(self._on_export_finished)
+        worker.failed.connect(self._on_export_failed)
+        worker.finished.connect(thread.quit)
+        worker.failed.connect(thread.quit)
+        thread.finished.connect(self._on_export_thread_done)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        self._export_thread = thread
+        self._export_worker = worker
+        self.btn_export.setEnabled(False)
+        thread.start()
 
-                doc.save(path)
+    def _on_export_finished(self, path: str):
+        QMessageBox.information(self, "Експорт", f"Файл збережено:\n{path}")
 
-            elif path.lower().endswith(".xlsx") or "Excel" in selected_filter:
-                df_out.to_excel(path, index=False)
-            else:
-                df_out.to_csv(path, index=False)
+    def _on_export_failed(self, message: str):
+        QMessageBox.critical(self, "Помилка експорту", message)
 
-            QMessageBox.information(self, "Експорт", f"Файл збережено:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Помилка експорту", str(e))
+    def _on_export_thread_done(self):
+        # ссылки сбрасываем только для того потока, что сейчас сохранён
+        if self.sender() is not self._export_thread:
+            return
+        self._export_thread = None
+        self._export_worker = None
+        self.btn_export.setEnabled(self.df_original is not None)
+
+    def closeEvent(self, event):
+        # не обрываем запись файла экспорта на середине
+        if self._export_thread is not None:
+            self._export_thread.quit()
+            self._export_thread.wait()
+        super().closeEvent(event)
 
     # -------------------- матчинг диалог --------------------
 